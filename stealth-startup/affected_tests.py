@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import re
+import time
+
+from import_graph import ImportGraph, resolve_import
+from project_index import index_path_for
+
+DEFAULT_RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "test_results")
+
+TEST_FILE_PATTERN = re.compile(r"(^|/)__tests__/|\.(test|spec)\.(js|jsx|ts|tsx|mjs)$")
+TEST_ROOTS = ("__tests__", "test", "tests")  # Top-level test directories, outside the indexed app/ and components/
+SOURCE_EXTENSIONS = (".js", ".jsx", ".ts", ".tsx", ".mjs")
+# Runners whose CLI takes test file paths after `npm test --`
+SELECTIVE_RUNNERS = ("jest", "vitest")
+# Anything that changes how every test runs
+RUNNER_FILES = ("package.json", "package-lock.json")
+
+
+class DiskPaths:
+    """Path set backed by the checkout, so resolve_import can find files outside the indexed directories."""
+
+    def __init__(self, project_path):
+        self.project_path = project_path
+
+    def __contains__(self, rel_path):
+        return os.path.isfile(os.path.join(self.project_path, rel_path))
+
+
+def file_hash(full_path):
+    try:
+        with open(full_path, "rb") as file:
+            return hashlib.sha1(file.read()).hexdigest()
+    except OSError:
+        return ""
+
+
+def read_test_script(project_path):
+    try:
+        with open(os.path.join(project_path, "package.json"), "r", encoding="utf-8") as file:
+            return (json.load(file).get("scripts") or {}).get("test")
+    except (OSError, ValueError):
+        return None
+
+
+def find_test_files(project_path, indexed_files):
+    """{path: source} of test files: those inside the indexed directories plus any under the top-level test roots."""
+    tests = {path: source for path, source in indexed_files.items() if TEST_FILE_PATTERN.search(path)}
+    for root in TEST_ROOTS:
+        for directory, subdirectories, names in os.walk(os.path.join(project_path, root)):
+            subdirectories[:] = [name for name in subdirectories if name != "node_modules"]
+            for name in names:
+                if not name.endswith(SOURCE_EXTENSIONS):
+                    continue
+                full_path = os.path.join(directory, name)
+                rel_path = os.path.relpath(full_path, project_path).replace(os.sep, "/")
+                try:
+                    with open(full_path, "r", encoding="utf-8") as file:
+                        tests[rel_path] = file.read()
+                except (OSError, UnicodeDecodeError):
+                    continue
+    return tests
+
+
+class TestSelector:
+    """Picks the tests a change can affect from the import graph, and remembers their results by content hash.
+
+    A test's result is keyed by the hashes of every file it transitively imports (and of package.json and the
+    lockfile), so a cached pass is only reused while none of that code changed.
+    """
+
+    def __init__(self, project_path, index, results_dir=DEFAULT_RESULTS_DIR, max_results=500):
+        self.project_path = project_path
+        self.index = index  # The ProjectIndex SWEAgent keeps of app/ and components/
+        self.results_path = index_path_for(project_path, results_dir)
+        self.max_results = max_results
+        self.results = self._load()  # {key: {"passed", "test", "recorded_at"}}
+
+    def _load(self):
+        try:
+            with open(self.results_path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        if len(self.results) > self.max_results:
+            newest = sorted(self.results.items(), key=lambda item: item[1]["recorded_at"])[-self.max_results:]
+            self.results = dict(newest)
+        os.makedirs(os.path.dirname(self.results_path), exist_ok=True)
+        tmp_path = f"{self.results_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(self.results, file)
+        os.replace(tmp_path, self.results_path)
+
+    def plan(self, changed_paths):
+        """What to run for a change: {"mode": "skip" | "selected" | "full", "reason", "tests", "keys"}."""
+        script = read_test_script(self.project_path)
+        if not script:
+            return {"mode": "skip", "reason": "package.json has no test script", "tests": []}
+        changed = set(changed_paths)
+        if not changed:
+            return {"mode": "skip", "reason": "nothing changed", "tests": []}
+
+        files = self.index.files()
+        tests = find_test_files(self.project_path, files)
+        runner = next((name for name in SELECTIVE_RUNNERS if re.search(rf"\b{name}\b", script)), None)
+        outside = sorted(path for path in changed if path not in files and path not in tests)
+        if runner is None:
+            return {"mode": "full", "reason": f"the test script ({script}) can't be given single test files", "tests": []}
+        if not tests:
+            return {"mode": "full", "reason": "no test files were found next to the code or under a test directory", "tests": []}
+        if outside:
+            return {"mode": "full", "reason": f"{', '.join(outside)} is outside the import graph", "tests": []}
+
+        graph = ImportGraph({**files, **tests})
+        on_disk = DiskPaths(self.project_path)
+        # A local import that doesn't resolve even on disk (an alias we don't know, a generated file) could point
+        # at the changed code, so everything that depends on such a file is treated as affected
+        uncertain = {path for path, specs in graph.unresolved.items()
+                     if any(resolve_import(spec, path, on_disk) is None for spec in specs)}
+        affected = graph.dependents(changed | uncertain)
+        selected = sorted(test for test in tests if test in affected)
+        if not selected:
+            return {"mode": "skip", "reason": "no test depends on the changed files", "tests": []}
+
+        runner_hash = "".join(file_hash(os.path.join(self.project_path, name)) for name in RUNNER_FILES)
+        keys = {test: self._key(test, graph, on_disk, runner_hash) for test in selected}
+        reason = f"{len(selected)} of {len(tests)} test files depend on {len(changed)} changed file(s)"
+        return {"mode": "selected", "reason": reason, "tests": selected, "keys": keys, "runner": runner}
+
+    def _key(self, test, graph, on_disk, runner_hash):
+        parts = [runner_hash]
+        for path in sorted(graph.dependencies([test])):
+            # Indexed files already carry a content hash; tests under the top-level test roots are hashed here
+            content_hash = self.index.file_hash(path) or file_hash(os.path.join(self.project_path, path))
+            parts.append(f"{path}:{content_hash}")
+            # Imports of files outside the graph (e.g. lib/) still change what the test runs
+            for spec in graph.unresolved.get(path, ()):
+                target = resolve_import(spec, path, on_disk)
+                if target is not None:
+                    parts.append(f"{target}:{file_hash(os.path.join(self.project_path, target))}")
+        return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def cached(self, key):
+        """True or False for a recorded result, None if this exact code was never tested."""
+        result = self.results.get(key)
+        return None if result is None else result["passed"]
+
+    def record(self, test, key, passed):
+        self.results[key] = {"passed": passed, "test": test, "recorded_at": time.time()}
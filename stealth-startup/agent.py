@@ -1,25 +1,40 @@
 import os
-import cohere
-import replicate
-import requests  # For downloading the image
 import random  # Import random for selecting a random message
 from io import BytesIO
-from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
 from typing import Any
 from helpers import *
 from swe_agent import SWEAgent
+from clients import registry
+from slack_stream import SlackStreamWriter
+from semantic_memory import SemanticMemory
+from tracing import tracer, usage_tokens
 
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+# Slack channels the agents post to; a simulation can point them elsewhere with the channels argument
+DEFAULT_CHANNELS = {
+    "discussion": "C07MF3WH7UJ",  # Team discussion, logos and branding
+    "ceo": "C07N3SLH5EU",  # CEO stage summaries
+}
+LOGO_MODEL = "black-forest-labs/flux-dev"
 
 class BaseAgent(ABC):
-    def __init__(self, name, id, role, cohere_api_key, slack_token, flux_token=None):
+    def __init__(self, name, id, role, cohere_api_key, slack_token, flux_token=None, llm_cache=None, streaming=False, outbox=None,
+                 memory_store=None, channels=None):
         self.name = name  # Agent's name, e.g., "Alice"
         self.id = id
         self.role = role  # Agent's role, e.g., "CTO"
-        self.cohere_client = cohere.Client(cohere_api_key, log_warning_experimental_features=False)  # Initialize Cohere client directly with API key
-        self.memory = []  # Memory to store previous actions or responses
-        self.slack_client = WebClient(token=slack_token)  # Initialize Slack client with token
+        self.cohere_client = registry.cohere(cohere_api_key)  # Shared, connection-pooled Cohere client for this API key
+        self.llm_cache = llm_cache  # Optional LLMCache; agents only reuse responses when one is passed in
+        self.memory = SemanticMemory()  # Bounded memory of previous actions, searchable by similarity
+        self.slack_client = registry.slack(slack_token)  # Shared Slack client for this token
+        self.streaming = streaming  # Stream replies into Slack as they are generated instead of posting once at the end
+        self.stream_metrics = []  # SlackStreamWriter metrics for every streamed message
+        self.outbox = outbox  # Optional SlackOutbox; when set, posts are queued and delivered in the background
+        self.memory_store = memory_store  # Optional MemoryStore shared with other agents and later runs
+        self.channels = {**DEFAULT_CHANNELS, **(channels or {})}
 
     @abstractmethod
     def take_instruction(self, instruction):
@@ -28,6 +43,8 @@ class BaseAgent(ABC):
 
     def send_message_to_slack(self, message, channel_id):
         """Send a message to Slack using the Slack SDK."""
+        if self.outbox is not None:
+            return self.outbox.post(self.slack_client, channel_id, message)
         try:
             response = self.slack_client.chat_postMessage(
                 channel=channel_id,
@@ -37,13 +54,36 @@ class BaseAgent(ABC):
         except SlackApiError as e:
             print(f"Failed to send message to Slack: {e.response['error']}")
 
-    def store_in_memory(self, instruction, action):
+    def store_in_memory(self, instruction, action, stage=None):
         """Stores the instruction and action in memory."""
-        self.memory.append({"instruction": instruction, "action": action})
+        self.memory.add(instruction, action)
+        self.record("memory", instruction, action, stage=stage)
+
+    def record(self, kind, instruction, content, stage=None, metadata=None):
+        """Writes to the durable memory store, if the agent has one; the write happens in the background."""
+        if self.memory_store is not None:
+            self.memory_store.record(self.id, kind, instruction, content, agent_name=self.name, role=self.role,
+                                     stage=stage, metadata=metadata)
 
     def recall_memory(self):
         """Recalls previous actions and responses from memory."""
-        return self.memory
+        return self.memory.recall()
+
+    def memory_context(self, query, k=3, max_chars=300):
+        """The past decisions most similar to the query, formatted for a prompt (empty when nothing matches)."""
+        entries = self.memory.search(query, k=k)
+        if not entries:
+            return ""
+        lines = []
+        for entry in entries:
+            action = " ".join(str(entry['action']).split())
+            lines.append(f"- {entry['instruction']}: {action[:max_chars]}")
+        return "Relevant past decisions:\n" + "\n".join(lines)
+
+    def with_memory(self, prompt, query=None):
+        """Prefixes the prompt with relevant memory, leaving it untouched when there is none."""
+        context = self.memory_context(query or prompt)
+        return f"{context}\n\n{prompt}" if context else prompt
     
     def process_instruction_with_llm(self, instruction: str) -> str:
         """Uses the Cohere LLM client to process the instruction."""
@@ -52,41 +92,124 @@ class BaseAgent(ABC):
         #print(prompt)
         #print("\n\n\n")
 
-        response = self.cohere_client.generate(
-            model="command-r-08-2024",
-            prompt=prompt,
-            max_tokens=150
-        )
-        result = response.generations[0].text.strip()
+        result = self.generate_text(prompt, model="command-r-08-2024", max_tokens=150)
         #print(f"{self.name} processed the instruction and generated: {result}")
         return result
 
+    def generate_text(self, prompt, model="command-r-08-2024", **params):
+        """Runs a Cohere generate call, going through the agent's response cache when it has one."""
+        def compute():
+            with tracer.span("cohere.generate", "cohere", model=model, agent=self.name, prompt_bytes=len(prompt)) as span:
+                response = self.cohere_client.generate(model=model, prompt=prompt, **params)
+                text = response.generations[0].text.strip()
+                prompt_tokens, completion_tokens = usage_tokens(response)
+                span.set(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, completion_bytes=len(text))
+                return text
+
+        if self.llm_cache is None:
+            return compute()
+        return self.llm_cache.get_or_compute("generate", model, prompt, params, compute)
+
+    def stream_to_slack(self, prompt, channel_id, model="command-r-08-2024", transform=None, **params):
+        """Streams a completion into a Slack message that fills in as tokens arrive, and returns the full text.
+
+        transform is applied to the finished text for the final edit (e.g. formatting or trimming quotes).
+        """
+        streamed = False
+
+        def compute():
+            nonlocal streamed
+            streamed = True
+            writer = SlackStreamWriter(self.slack_client, channel_id)
+            with tracer.span("cohere.generate_stream", "cohere", model=model, agent=self.name, prompt_bytes=len(prompt)) as span:
+                for event in self.cohere_client.generate_stream(model=model, prompt=prompt, **params):
+                    if event.event_type == "text-generation":
+                        writer.write(event.text)
+                    elif event.event_type == "stream-end":
+                        prompt_tokens, completion_tokens = usage_tokens(getattr(event, "response", None))
+                        span.set(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+                text = writer.close(transform)
+                span.set(completion_bytes=len(text), time_to_first_token=writer.metrics()["time_to_first_token"])
+
+            metrics = writer.metrics()
+            self.stream_metrics.append(metrics)
+            if metrics["time_to_first_visible"] is not None:
+                print(f"{self.name}: first text visible in Slack after {metrics['time_to_first_visible']:.2f}s "
+                      f"({metrics['updates']} updates, {metrics['total_time']:.2f}s total)")
+            return text
+
+        if self.llm_cache is None:
+            return compute()
+        # Shares cache entries with generate_text; a hit is posted whole since there is nothing to stream
+        text = self.llm_cache.get_or_compute("generate", model, prompt, params, compute)
+        if not streamed:
+            self.send_message_to_slack(transform(text) if transform else text, channel_id)
+        return text
+
     def get_slack_id(self):
         """Getter method to get specific users slack ID."""
         return self.id
     
     def summarize(self, text: str) -> str:
         """Summarized thoughts for slack output."""
+        response = self.process_instruction_with_llm(self.summary_prompt(text))
+        return response 
+
+    def summary_prompt(self, text: str) -> str:
         prompt = f"""DO NOT USE MARKDOWN FORMATTING. Summarize the text I gave you in 3-4 bullet points. Be CONCISE. This
         will be outputted to the slack channel for a summarized version of everything you've been thinking. Talk in 1st person as if you are the CEO thinking out loud.
          Focus on the high-level stuff."""
-        response = self.process_instruction_with_llm(f"{prompt}: {text}")
-        return response 
+        return f"{prompt}: {text}"
 
     @abstractmethod
     def generate_message(self, prompt):
         pass
 
+    # Agents that can reply speculatively also define draft_message(prompt), which generates a reply without posting
+    # or storing it, and publish_message(draft), which posts and stores that draft.
+
+
+# The CEO's planning stages, in order. Each prompt gets the previous stage's raw output as {previous_output}
+# and the CEO's market as {market}.
+CEO_STAGES = [
+    {
+        "name": "market_research",
+        "instruction": "Market Research",
+        "prompt": """DO NOT USE MARKDOWN FORMATTING. I'm the CEO of a tech startup looking to enter {market}. I need to get a clear understanding of the current market dynamics. 
+            What are the key trends, challenges, and opportunities in this space? I want to find the major players, the gaps they're not addressing, and where we could make an impact. 
+            Talk in 1st person as if you are the CEO thinking out loud. """,
+    },
+    {
+        "name": "idea_creation",
+        "instruction": "Tech Idea Creation",
+        "prompt": """DO NOT USE MARKDOWN FORMATTING. Now that I've gathered valuable insights from my market research, I need to come up with a tech idea that can really make an impact. 
+            Based on the trends and opportunities I uncovered—{previous_output}—what innovative solution can we develop that solves the biggest pain points in this space? 
+            Talk in 1st person as if you are the CEO thinking out loud.""",
+    },
+    {
+        "name": "product_creation",
+        "instruction": "Product Creation",
+        "prompt": """DO NOT USE MARKDOWN FORMATTING. I've now developed a strong tech idea: {previous_output}. The next step is to conceptualize the product around this idea.
+            I need to think about how we can bring this idea to life in a way that solves the problem effectively, while also creating a product that is easy to use, scalable, and marketable. 
+            Talk in 1st person as if you are the CEO thinking out loud.""",
+    },
+    {
+        "name": "business_plan",
+        "instruction": "Business Plan Finalization",
+        "prompt": """DO NOT USE MARKDOWN FORMATTING. Now that we've conceptualized the product, it's time to finalize the business plan. The product is based on {previous_output}, and I need to think carefully about our strategy moving forward.
+            What's our go-to-market strategy? How should we position ourselves against competitors, and what’s our revenue model? This business plan needs to be forward-looking and adaptable as we grow. 
+            Talk in 1st person as if you are the CEO thinking out loud.""",
+    },
+]
+
 
 class CEO(BaseAgent):
-    def __init__(self, name, id, cohere_api_key, slack_token):
-        super().__init__(name, id, "CEO", cohere_api_key, slack_token)
-        self.stages = [
-            "market_research",
-            "idea_creation",
-            "product_creation",
-            "business_plan",
-        ]  # List of stages in order
+    def __init__(self, name, id, cohere_api_key, slack_token, llm_cache=None, streaming=False, outbox=None, memory_store=None,
+                 channels=None, market="the AI-driven healthcare market"):
+        super().__init__(name, id, "CEO", cohere_api_key, slack_token, llm_cache=llm_cache, streaming=streaming, outbox=outbox,
+                         memory_store=memory_store, channels=channels)
+        self.market = market  # The market the planning stages research
+        self.stages = CEO_STAGES  # List of stages in order
         self.current_stage_index = 0  # Initial stage index
 
     def take_instruction(self, instruction):
@@ -95,64 +218,74 @@ class CEO(BaseAgent):
         self.run_stage(instruction)
 
     def run_stage(self, previous_output):
-        """General function to handle each stage recursively."""
-        if self.current_stage_index >= len(self.stages):
-            print("Feedback loop complete. Business plan is ready for execution.")
-            self.send_message_to_slack("Business plan is ready for execution.", "C07N3SLH5EU")
-            return  # End the recursive process when all stages are done
-        
-        current_stage = self.stages[self.current_stage_index]
-        
-        # Determine the prompt based on the current stage
-        if current_stage == "market_research":
-            prompt = f"""DO NOT USE MARKDOWN FORMATTING. I'm the CEO of a tech startup looking to enter the AI-driven healthcare market. I need to get a clear understanding of the current market dynamics. 
-            What are the key trends, challenges, and opportunities in this space? I want to find the major players, the gaps they're not addressing, and where we could make an impact. 
-            Talk in 1st person as if you are the CEO thinking out loud. """
-            instruction = "Market Research"
-        
-        elif current_stage == "idea_creation":
-            prompt = f"""DO NOT USE MARKDOWN FORMATTING. Now that I've gathered valuable insights from my market research, I need to come up with a tech idea that can really make an impact. 
-            Based on the trends and opportunities I uncovered—{previous_output}—what innovative solution can we develop that solves the biggest pain points in this space? 
-            Talk in 1st person as if you are the CEO thinking out loud."""
-            instruction = "Tech Idea Creation"
-        
-        elif current_stage == "product_creation":
-            prompt = f"""DO NOT USE MARKDOWN FORMATTING. I've now developed a strong tech idea: {previous_output}. The next step is to conceptualize the product around this idea.
-            I need to think about how we can bring this idea to life in a way that solves the problem effectively, while also creating a product that is easy to use, scalable, and marketable. 
-            Talk in 1st person as if you are the CEO thinking out loud."""
-            instruction = "Product Creation"
-        
-        elif current_stage == "business_plan":
-            prompt = f"""DO NOT USE MARKDOWN FORMATTING. Now that we've conceptualized the product, it's time to finalize the business plan. The product is based on {previous_output}, and I need to think carefully about our strategy moving forward.
-            What's our go-to-market strategy? How should we position ourselves against competitors, and what’s our revenue model? This business plan needs to be forward-looking and adaptable as we grow. 
-            Talk in 1st person as if you are the CEO thinking out loud."""
-            instruction = "Business Plan Finalization"
-        
-        # Process the prompt with the LLM
-        response = self.process_instruction_with_llm(prompt)
-        self.store_in_memory(instruction, response)
-        summarized_response = self.summarize(response)
-        self.send_message_to_slack(f"{instruction}: {summarized_response}", "C07N3SLH5EU")  # Send to Slack
+        """Runs the remaining stages in order, keeping summaries and Slack posts off the critical path.
+
+        Each stage only needs the previous stage's raw response, so the next main LLM call starts right away
+        while the summary is generated in the background and posted by a single worker that keeps stage order.
+        """
+        # The pools shut down even if a stage fails, after posting the summaries of the stages that finished
+        with ThreadPoolExecutor(max_workers=len(self.stages)) as summarizer, ThreadPoolExecutor(max_workers=1) as poster:
+            deliveries = []
+
+            while self.current_stage_index < len(self.stages):
+                stage = self.stages[self.current_stage_index]
+                prompt = stage["prompt"].format(previous_output=previous_output, market=self.market)
+
+                # Process the prompt with the LLM
+                response = self.process_instruction_with_llm(prompt)
+                self.store_in_memory(stage["instruction"], response, stage=stage["name"])
 
-        # Move to the next stage
-        self.current_stage_index += 1
+                summary = summarizer.submit(tracer.bind(self.summarize), response)
+                deliveries.append(poster.submit(tracer.bind(self._post_stage_summary), stage["instruction"], summary))
 
-        # Recursively call the function to proceed to the next stage
-        self.run_stage(response)
+                # Move to the next stage
+                self.current_stage_index += 1
+                previous_output = response
+
+            # Every stage summary is delivered before the plan is announced
+            for delivery in deliveries:
+                delivery.result()
+
+        print("Feedback loop complete. Business plan is ready for execution.")
+        self.send_message_to_slack("Business plan is ready for execution.", self.channels["ceo"])
+
+    def _post_stage_summary(self, instruction, summary):
+        try:
+            summarized_response = summary.result()
+        except Exception as e:
+            print(f"Failed to summarize {instruction}: {e}")
+            return
+        self.send_message_to_slack(f"{instruction}: {summarized_response}", self.channels["ceo"])  # Send to Slack
     
     def generate_message(self, prompt):
-        response = self.process_instruction_with_llm(prompt)
-        self.store_in_memory("Generate Response", response)
-        self.send_message_to_slack(f"{trim_quotations(response)}", "C07MF3WH7UJ")
+        if self.streaming:
+            response = self.stream_to_slack(self.with_memory(prompt), self.channels["discussion"], transform=trim_quotations, max_tokens=150)
+            self.store_in_memory("Generate Response", response)
+            return
+        self.publish_message(self.draft_message(prompt))
+
+    def draft_message(self, prompt):
+        return self.process_instruction_with_llm(self.with_memory(prompt))
+
+    def publish_message(self, draft):
+        self.store_in_memory("Generate Response", draft)
+        self.send_message_to_slack(f"{trim_quotations(draft)}", self.channels["discussion"])
 
 
 class Marketer(BaseAgent):
-    def __init__(self, name, id, role, cohere_api_key, slack_token, flux_token):
-        super().__init__(name, id, role, cohere_api_key, slack_token, flux_token)
-        self.slack_client = WebClient(token=slack_token)
+    def __init__(self, name, id, role, cohere_api_key, slack_token, flux_token, llm_cache=None, streaming=False, outbox=None,
+                 memory_store=None, channels=None, asset_store=None, logo_variants=1, logo_seed=None):
+        super().__init__(name, id, role, cohere_api_key, slack_token, flux_token, llm_cache=llm_cache, streaming=streaming, outbox=outbox,
+                         memory_store=memory_store, channels=channels)
 
         # Get Replicate API token from environment variables
         self.replicate_api_token = flux_token
+        self.replicate_client = registry.replicate(flux_token)
+        self.asset_store = asset_store  # Local copies of generated images; repeated prompt/seed pairs skip Replicate
+        self.logo_variants = logo_variants  # Seeds generated side by side per logo request
+        # Variant i uses seed logo_seed + i. None picks a random base seed per request, so every run gets new logos;
+        # a fixed seed makes reruns reuse the stored images instead of calling Replicate
+        self.logo_seed = logo_seed
         self.metadata = {
             "branding_documents": [],  # Store branding documents
             "logos": []  # Store logo URLs and related metadata
@@ -163,7 +296,7 @@ class Marketer(BaseAgent):
         response = self.process_instruction_with_llm(instruction)
 
         if "logo" in instruction.lower():
-            action = self.create_logo(instruction)
+            action = self.create_logo()
         elif "branding" in instruction.lower():
             action = self.create_branding_document()
         else:
@@ -183,14 +316,15 @@ class Marketer(BaseAgent):
 
                 Now, respond as the marketing with creative flair. Provide creative thoughts and discuss further iterations. Focus on solutions, but keep it conversational. This is a serious matter. Focus on the task at hand.
                 """
-        response = self.process_instruction_with_llm(prompt)
-        self.send_message_to_slack(f"{response}", "C07MF3WH7UJ")
+        response = self.process_instruction_with_llm(self.with_memory(prompt, query=text))
+        self.store_in_memory("Generate Response", response)
+        self.send_message_to_slack(f"{response}", self.channels["discussion"])
 
 
 
     def create_logo(self):
-        """Generates a logo using Replicate API and generates a human-like reply using Cohere, then sends it to Slack."""
-        print(f"{self.name} is generating a logo with Replicate...")
+        """Generates logo variants with Replicate and a human-like caption with Cohere at the same time, then sends them to Slack."""
+        print(f"{self.name} is generating {self.logo_variants} logo variant(s) with Replicate...")
 
         # Static prompt for the logo creation
         logo_prompt = (
@@ -200,56 +334,103 @@ class Marketer(BaseAgent):
             "that evoke safety, such as blue or green, but keep the overall design sleek and professional."
         )
 
-        try:
-            # Set up the input for the Replicate API to generate the logo
-            input = {
-                "prompt": logo_prompt,
-                "guidance": 3.5  # Customize guidance if needed
-            }
-
-            # Call Replicate API to generate the image
-            output = replicate.run(
-                "black-forest-labs/flux-dev",
-                input=input
-            )
-            image_url = output[0]  # The first image URL generated
-
-            # Now, generate the human-like message using Cohere
-            message_prompt = (
-                "Generate a friendly, human-like message from a marketer presenting a draft of a new company logo to the team. "
-                "The logo is for a tech company called 'Echo', which builds automated 911 caller systems. The message should be "
-                "informal, encourage feedback, and describe the design briefly."
-            )
-
-            # Call the Cohere API to generate the message
-            cohere_response = self.cohere_client.generate(
-                model='command-xlarge-nightly',  # Use a large model for high-quality text
-                prompt=message_prompt,
-                max_tokens=100,
-                temperature=0.8  # Adjust the temperature for more creativity
-            )
-
-            # Extract the generated message from Cohere's response
-            generated_message = cohere_response.generations[0].text.strip()
-
-            # Combine the generated message with the image URL
-            message = f"{generated_message}\n\n{image_url}"
+        # The caption doesn't depend on the images, so it's written while they render
+        message_prompt = (
+            "Generate a friendly, human-like message from a marketer presenting a draft of a new company logo to the team. "
+            "The logo is for a tech company called 'Echo', which builds automated 911 caller systems. The message should be "
+            "informal, encourage feedback, and describe the design briefly."
+        )
 
-            # Send the Cohere-generated message with the image link to Slack
-            self.send_image_link_to_slack(message)
+        try:
+            with ThreadPoolExecutor(max_workers=self.logo_variants + 1) as pool:
+                caption = pool.submit(
+                    tracer.bind(self.generate_text),
+                    message_prompt,
+                    model='command-xlarge-nightly',  # Use a large model for high-quality text
+                    max_tokens=100,
+                    temperature=0.8  # Adjust the temperature for more creativity
+                )
+                base_seed = random.randrange(2 ** 31) if self.logo_seed is None else self.logo_seed
+                seeds = [base_seed + i for i in range(self.logo_variants)]
+                variants = [pool.submit(tracer.bind(self.generate_logo_variant), logo_prompt, seed) for seed in seeds]
+
+                logos = []
+                for seed, variant in zip(seeds, variants):
+                    try:
+                        logos.append({**variant.result(), "seed": seed})
+                    except Exception as e:
+                        print(f"Logo variant with seed {seed} failed: {e}")
+                if not logos:
+                    raise RuntimeError("every logo variant failed")
+                generated_message = caption.result()
+
+            # Replicate delivery URLs expire, so logos served from the asset store are uploaded from the local copy
+            stored = [logo for logo in logos if logo["cached"] and logo["path"]]
+            image_urls = [logo["url"] for logo in logos if logo not in stored]
+            message = f"{generated_message}\n\n" + "\n".join(image_urls)
+
+            # Send the Cohere-generated message with the image links (and any stored images) to Slack
+            if stored:
+                self.upload_images_to_slack(message.strip(), [logo["path"] for logo in stored])
+            else:
+                self.send_image_link_to_slack(message)
 
-            self.metadata["logos"].append({
-                "url": image_url,
-                "description": generated_message,
-                "prompt": logo_prompt  # Storing the prompt for future context
-            })
+            for logo in logos:
+                logo.update(description=generated_message, prompt=logo_prompt)  # Storing the prompt for future context
+                self.metadata["logos"].append(logo)
+                self.record("logo", logo_prompt, logo["url"], metadata=logo)
 
-            action = f"{self.name} shared a draft logo: {image_url}"
+            reused = sum(1 for logo in logos if logo["cached"])
+            print(f"{len(logos)} logo variant(s) ready, {reused} served from the asset store.")
+            action = f"{self.name} shared {len(logos)} draft logo(s): {', '.join(image_urls + [logo['path'] for logo in stored])}"
             return action
         except Exception as e:
             print(f"An unexpected error occurred: {e}")
             return "Failed to create a logo."
 
+    def generate_logo_variant(self, prompt, seed, guidance=3.5):
+        """One logo image for this prompt and seed: the stored copy if there is one, otherwise a new Replicate prediction.
+
+        Returns {"url", "path", "digest", "cached"}; path and digest are None when there's no asset store or the
+        download failed.
+        """
+        params = {"guidance": guidance}  # Customize guidance if needed
+        if self.asset_store is not None:
+            asset = self.asset_store.lookup(LOGO_MODEL, prompt, seed, params)
+            if asset is not None:
+                return {"url": asset["url"], "path": asset["path"], "digest": asset["digest"], "cached": True}
+
+        # Call Replicate API to generate the image
+        with tracer.span("replicate.run", "replicate", model=LOGO_MODEL, agent=self.name, prompt_bytes=len(prompt), seed=seed):
+            output = self.replicate_client.run(LOGO_MODEL, input={"prompt": prompt, "seed": seed, **params})
+        image = output[0]  # The first image generated
+        image_url = str(getattr(image, "url", image))  # Newer clients return FileOutput objects instead of URLs
+        logo = {"url": image_url, "path": None, "digest": None, "cached": False}
+        if self.asset_store is None:
+            return logo
+
+        try:
+            data, content_type = self.download_image(image, image_url)
+        except Exception as e:
+            # The remote URL still works for a while, so the logo is kept without a local copy
+            print(f"Could not download {image_url}: {e}")
+            return logo
+        asset = self.asset_store.put(LOGO_MODEL, prompt, seed, data, source_url=image_url, content_type=content_type, params=params)
+        logo.update(path=asset["path"], digest=asset["digest"])
+        return logo
+
+    def download_image(self, image, image_url):
+        """Bytes and content type of a Replicate output, over the pooled Replicate connection."""
+        with tracer.span("replicate.download", "replicate", agent=self.name) as span:
+            if hasattr(image, "read"):
+                data, content_type = image.read(), None
+            else:
+                response = registry.http("replicate").get(image_url, follow_redirects=True)
+                response.raise_for_status()
+                data, content_type = response.content, response.headers.get("content-type")
+            span.set(response_bytes=len(data))
+        return data, content_type
+
     def create_branding_document(self):
         """Generates a branding document using Cohere and formats it as structured text for Slack."""
         print(f"{self.name} is generating a branding document using Cohere...")
@@ -270,17 +451,26 @@ class Marketer(BaseAgent):
             Format the document in a clear, professional manner.
             """
 
-            # Call the Cohere API to generate the branding document text
-            response = self.cohere_client.generate(
-                model='command-xlarge-nightly',
-                prompt=prompt,
-                max_tokens=500,
-                temperature=0.8
-            )
+            if self.streaming:
+                # The raw document fills in live, then the final edit swaps in the formatted version
+                branding_document = self.stream_to_slack(
+                    prompt,
+                    self.channels["discussion"],
+                    model='command-xlarge-nightly',
+                    transform=self.format_branding_document,
+                    max_tokens=500,
+                    temperature=0.8
+                )
+            else:
+                # Call the Cohere API to generate the branding document text
+                branding_document = self.generate_text(
+                    prompt,
+                    model='command-xlarge-nightly',
+                    max_tokens=500,
+                    temperature=0.8
+                )
 
             print("Cohere response received.")
-            # Extract the generated document from the response
-            branding_document = response.generations[0].text.strip()
 
             # Check if the branding document is valid
             if not branding_document:
@@ -291,8 +481,9 @@ class Marketer(BaseAgent):
             # Step 2: Format the branding document dynamically
             formatted_document = self.format_branding_document(branding_document)
 
-            # Step 3: Send the formatted branding document to Slack
-            self.send_text_to_slack(formatted_document)
+            # Step 3: Send the formatted branding document to Slack (already there when streamed)
+            if not self.streaming:
+                self.send_text_to_slack(formatted_document)
 
             # Store the branding document in metadata
             self.metadata["branding_documents"].append({
@@ -300,6 +491,7 @@ class Marketer(BaseAgent):
                 "formatted": formatted_document,
                 "prompt": prompt
             })
+            self.record("branding_document", prompt, branding_document, metadata={"formatted": formatted_document})
 
             print("Branding document stored in metadata and sent to Slack successfully.")
             action = f"{self.name} created and shared a formatted branding document."
@@ -314,9 +506,13 @@ class Marketer(BaseAgent):
     
     def send_text_to_slack(self, text):
         """Sends a text message to a Slack channel."""
+        if self.outbox is not None:
+            self.outbox.post(self.slack_client, self.channels["discussion"], text)
+            print("Branding document queued for Slack.")
+            return
         try:
             response = self.slack_client.chat_postMessage(
-                channel="C07MF3WH7UJ",  # Replace with your Slack channel ID
+                channel=self.channels["discussion"],
                 text=text
             )
             print("Branding document sent to Slack successfully!")
@@ -325,15 +521,33 @@ class Marketer(BaseAgent):
 
     def send_image_link_to_slack(self, message):
         """Sends the generated message along with the image link to a Slack channel."""
+        if self.outbox is not None:
+            self.outbox.post(self.slack_client, self.channels["discussion"], message)
+            print("Cohere-generated message with image URL queued for Slack.")
+            return
         try:
             response = self.slack_client.chat_postMessage(
-                channel="C07MF3WH7UJ",  # Replace with your Slack channel ID
+                channel=self.channels["discussion"],
                 text=message
             )
             print("Cohere-generated message with image URL sent to Slack successfully!")
         except SlackApiError as e:
             print(f"Slack API error: {e.response['error']}")
     
+    def upload_images_to_slack(self, message, paths):
+        """Uploads local image files to the discussion channel in one message, with the text as its comment."""
+        try:
+            # Uploads go straight to Slack rather than through the outbox, which only posts text
+            self.slack_client.files_upload_v2(
+                channel=self.channels["discussion"],
+                initial_comment=message,
+                file_uploads=[{"file": path, "filename": os.path.basename(path)} for path in paths],
+            )
+            print(f"Cohere-generated message with {len(paths)} stored image(s) uploaded to Slack.")
+        except (SlackApiError, OSError) as e:
+            print(f"Failed to upload images to Slack: {e}")
+            self.send_image_link_to_slack(message)
+
     def format_branding_document(self, branding_document):
         """
         Formats the branding document text dynamically by applying bullet points and basic formatting
@@ -377,11 +591,16 @@ class Marketer(BaseAgent):
 
 
 class CTOAgent(BaseAgent):
-    def __init__(self, name, id, cohere_api_key, slack_token, github_repo_path, github_token):
-        super().__init__(name, id, "CTO", cohere_api_key, slack_token)
+    def __init__(self, name, id, cohere_api_key, slack_token, github_repo_path, github_token, llm_cache=None, streaming=False, outbox=None,
+                 memory_store=None, channels=None, stream_edits=False, shard_edits=False):
+        super().__init__(name, id, "CTO", cohere_api_key, slack_token, llm_cache=llm_cache, streaming=streaming, outbox=outbox,
+                         memory_store=memory_store, channels=channels)
         self.github_repo_path = github_repo_path  # Path to the local GitHub repository
         self.github_token = github_token  # GitHub Personal Access Token (for HTTPS authentication)
-        self.swe_agent = SWEAgent(self.github_repo_path)  # Initialize the SWEAgent to handle project changes
+        self.swe_agent = SWEAgent(self.github_repo_path, stream_edits=stream_edits, shard_edits=shard_edits)  # Initialize the SWEAgent to handle project changes
+        if stream_edits and shard_edits:
+            # Sharded files are generated in separate calls and applied together, so there's no single stream to write from
+            print(f"{self.name}: shard_edits and stream_edits are both set; edits will be sharded, not streamed.")
 
     def take_instruction(self, instruction):
         """Process an instruction to implement code-related changes."""
@@ -395,34 +614,59 @@ class CTOAgent(BaseAgent):
         # Step 1: Map the project directory
         project_map = self.swe_agent.map_directory()
 
-        # Step 2: Propose changes based on the task
-        proposed_changes = self.swe_agent.propose_changes(task_description)
-
-        # Step 3: Ask for confirmation to implement the changes
-        """ user_input = input("Do you want to implement the proposed changes? (Y/N): ")
-        if user_input.strip().upper() == 'Y': """
-        self.swe_agent.implement_feature(proposed_changes)
+        if self.swe_agent.stream_edits and not self.swe_agent.shard_edits:
+            # Steps 2 and 3 together: each file is written as soon as the model finishes it
+            proposed_changes = self.swe_agent.stream_changes(task_description)
+        else:
+            # Step 2: Propose changes based on the task
+            proposed_changes = self.swe_agent.propose_changes(task_description)
+
+            # Step 3: Ask for confirmation to implement the changes
+            """ user_input = input("Do you want to implement the proposed changes? (Y/N): ")
+            if user_input.strip().upper() == 'Y': """
+            self.swe_agent.implement_feature(proposed_changes)
+        self.store_in_memory(task_description, f"Changed {', '.join(proposed_changes) or 'no files'}")
+        # Only the tests that can see the change run, so this stays cheap for small edits
+        if self.swe_agent.run_tests() is False:
+            print("Tests failed after the change; committing anyway so the team can see it.")
         print("Changes implemented. Pushing to GitHub...")
-        self.push_changes_to_github()
+        self.push_changes_to_github(task_description)
         """ else:
             print("Changes were not implemented.") """
 
-    def push_changes_to_github(self):
+    def push_changes_to_github(self, task_description=None):
         """Commit and push the changes to the linked GitHub repository."""
-        self.swe_agent.commit_changes()  # Commit changes using SWEAgent
+        if not self.swe_agent.commit_changes(task_description):  # Commit changes using SWEAgent
+            print("Nothing was committed, skipping the push.")
+            return
         print(f"Changes have been committed to the repository at {self.github_repo_path}.")
+        if not self.github_token:
+            print("No GitHub token configured, skipping the push.")
+            return
 
         # Push the committed changes to the GitHub repository
         try:
             repo_url = f"https://{self.github_token}@github.com/rajansagarwal/stealth-startup-dev.git"
-            os.system(f'git -C {self.github_repo_path} push {repo_url}')
+            with tracer.span("git push", "git", agent=self.name) as span:
+                exit_code = os.system(f'git -C {self.github_repo_path} push {repo_url}')
+                span.set(exit_code=exit_code)
+            if exit_code != 0:
+                print(f"Failed to push changes: git exited with status {exit_code}")
+                return
             print(f"Changes pushed to {repo_url}.")
         except Exception as e:
             print(f"Failed to push changes: {e}")
 
-    def view_ceo_memory(self, ceo_agent):
+    def view_ceo_memory(self, ceo_agent, limit=20):
         """View the memory/messages of the CEO (or other agent)."""
-        memory = ceo_agent.recall_memory()
+        if self.memory_store is not None:
+            # One indexed query; also sees what the agent stored in other processes or earlier runs.
+            # Writes are batched in the background, so commit the pending ones first
+            self.memory_store.flush()
+            rows = self.memory_store.query(agent=ceo_agent.id, kind="memory", limit=limit)
+            memory = [{"instruction": row["instruction"], "action": row["content"]} for row in reversed(rows)]
+        else:
+            memory = ceo_agent.recall_memory()
         if memory:
             print(f"{ceo_agent.name}'s Memory:")
             for idx, entry in enumerate(memory):
@@ -433,7 +677,25 @@ class CTOAgent(BaseAgent):
 
     def generate_message(self, text) -> str:
         """General endpoint to have a conversation with the CTO agent."""
-        prompt=f"""
+        if self.streaming:
+            response = self.process_instruction_with_llm(self.with_memory(self.reply_prompt(text), query=text))
+            self.store_in_memory("Generate Response", response)
+            # Only the summary is posted, so that's the call worth streaming
+            self.stream_to_slack(self.summary_prompt(response), self.channels["discussion"], max_tokens=150)
+            return
+        self.publish_message(self.draft_message(text))
+
+    def draft_message(self, text):
+        # The summary is part of the draft so both LLM calls happen before the CTO is picked
+        response = self.process_instruction_with_llm(self.with_memory(self.reply_prompt(text), query=text))
+        return {"response": response, "summary": self.summarize(response)}
+
+    def publish_message(self, draft):
+        self.store_in_memory("Generate Response", draft["response"])
+        self.send_message_to_slack(f"{draft['summary']}", self.channels["discussion"])
+
+    def reply_prompt(self, text):
+        return f"""
                 As the CTO of a fast-growing tech startup, you're known for your deep technical expertise and ability to simplify complex subjects. You’ve been brought into a Slack discussion where various technical challenges are being debated. Read the following message carefully and respond with sound technical advice, thoughtful insights, and clear action points. Your tone should be confident but approachable, demonstrating strong leadership while maintaining open communication with your team.
 
                 Avoid using markdown formatting. Instead, focus on explaining key technical ideas in a structured, logical manner. Use precise language that non-technical and technical members alike can understand. Be sure to provide actionable next steps or solutions to address the technical issues discussed.
@@ -450,6 +712,4 @@ class CTOAgent(BaseAgent):
 
                 Now, respond as the CTO with sound technical knowledge. Assign another employee a task directly. Make the task specific. Focus on solutions, but keep it conversational. Be extremely serious.
                 """
-        response = self.process_instruction_with_llm(prompt)
-        self.send_message_to_slack(f"{self.summarize(response)}", "C07MF3WH7UJ")
 
@@ -1,64 +1,174 @@
+import argparse
 import os
-from slack_sdk import WebClient
+import time
 from slack_sdk.errors import SlackApiError
 from dotenv import load_dotenv
-from agent import CEO, CTOAgent, Marketer
+from agent import CEO, CTOAgent, Marketer, DEFAULT_CHANNELS
 from dictator import Dictator
-import time
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Initialize the Slack WebClient with Bot User OAuth Token
+from slack_events import SocketModeEventSource
+from llm_cache import LLMCache
+from clients import registry
+from slack_outbox import SlackOutbox
+from memory_store import MemoryStore, DEFAULT_STORE_PATH
+from asset_store import AssetStore, DEFAULT_ASSET_DIR
+from tracing import tracer
 
-# Initialize the agent
-cohere_api_key = os.getenv("COHERE_API_KEY")
-slack_token = os.getenv("IAN_K_SLACK_BOT_TOKEN")
-cto_slack_token = os.getenv("ELIJAH_K_SLACK_BOT_TOKEN")
-marketer_slack_token = os.getenv("MARKETER_SLACK_BOT_TOKEN")
-replicate_api_token = os.getenv("REPLICATE_API_TOKEN")  # Ensure Replicate API token is loaded
-repo_path = "../stealth-startup-dev"  # Path to the external repo
-PAT = os.getenv("GITHUB_PAT")
 ceo_slack_id = "U07M0K20NB1"
 cto_slack_id = "U07MUQUCU6M"
-client = WebClient(token=slack_token)
-#ceo_slack_id = os.getenv("CEO_SLACK_ID")  # The Slack ID for the CEO
-
-# Initialize agents
-ceo_agent = CEO(name="Ian Korovinsky", id=ceo_slack_id, cohere_api_key=cohere_api_key, slack_token=slack_token)
-cto_agent = CTOAgent(name="Elijah Kurien", id=cto_slack_id, cohere_api_key=cohere_api_key, slack_token=cto_slack_token, github_repo_path=repo_path, github_token=PAT)
-# Initialize the Marketer agent
-marketer_agent = Marketer(
-    name="Lily Zhang", 
-    id="U07MVBVPXB3",  # Replace with your marketer's Slack ID
-    role="Marketing Specialist", 
-    cohere_api_key=cohere_api_key, 
-    slack_token=marketer_slack_token,
-    flux_token=replicate_api_token
-)
-
-employees = {
-    ceo_agent.id: ceo_agent,
-    cto_agent.id: cto_agent,
-    marketer_agent.id: marketer_agent
-}
-
-roles_to_agents = {
-    "CEO": ceo_agent,
-    "CTO": cto_agent,
-    "Marketer": marketer_agent
-}
-
-print("\n\nVERY START:", employees)
-#print(employees)
-dictator = Dictator(name="Dictator", cohere_api_key=cohere_api_key, employees=employees, channel_id="C07MF3WH7UJ", slack_client=client, roles_to_agents=roles_to_agents)
-
-# CEO executes a task (e.g., setting up company goals)
-# ceo_agent.take_instruction("the AI-driven healthcare market")
-
-channel_id = "C07MF3WH7UJ"  # Replace with your actual Slack channel ID
-messages = []
-
-for event in dictator.events:
-    time.sleep(5)
-    dictator.process_event(event, channel_id)
+marketer_slack_id = "U07MVBVPXB3"  # Replace with your marketer's Slack ID
+DEFAULT_TRACE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "traces")
+
+
+def load_settings():
+    """Reads API tokens and feature flags from the environment (and the .env file)."""
+    # Load environment variables from .env file
+    load_dotenv()
+    return {
+        "cohere_api_key": os.getenv("COHERE_API_KEY"),
+        "slack_token": os.getenv("IAN_K_SLACK_BOT_TOKEN"),
+        "cto_slack_token": os.getenv("ELIJAH_K_SLACK_BOT_TOKEN"),
+        "marketer_slack_token": os.getenv("MARKETER_SLACK_BOT_TOKEN"),
+        "replicate_api_token": os.getenv("REPLICATE_API_TOKEN"),  # Ensure Replicate API token is loaded
+        "repo_path": "../stealth-startup-dev",  # Path to the external repo
+        "channels": dict(DEFAULT_CHANNELS),  # Replace with your actual Slack channel IDs
+        "market": "the AI-driven healthcare market",  # What the CEO's planning stages research
+        "github_token": os.getenv("GITHUB_PAT"),
+        "slack_app_token": os.getenv("SLACK_APP_TOKEN"),
+        # Reuse identical completions across runs when LLM_CACHE=1 (sampled calls still go to Cohere)
+        "llm_cache": os.getenv("LLM_CACHE") == "1",
+        # STREAM_TO_SLACK=1 shows replies in Slack while they're still being generated
+        "streaming": os.getenv("STREAM_TO_SLACK") == "1",
+        # SPECULATIVE_DRAFTS=N drafts the N likeliest replies while the Dictator is still choosing who answers
+        "speculative_drafts": int(os.getenv("SPECULATIVE_DRAFTS", "0")),
+        # STREAM_EDITS=1 writes each file the CTO changes as soon as the model finishes it
+        "stream_edits": os.getenv("STREAM_EDITS") == "1",
+        # SHARD_EDITS=1 plans the files first and generates each one in its own parallel call (wins over STREAM_EDITS)
+        "shard_edits": os.getenv("SHARD_EDITS") == "1",
+        # LOGO_VARIANTS=N renders N seeds of each logo side by side
+        "logo_variants": int(os.getenv("LOGO_VARIANTS", "1")),
+        # LOGO_SEED=N reuses the same seeds every run, so logos come from the asset store instead of Replicate
+        "logo_seed": int(os.getenv("LOGO_SEED")) if os.getenv("LOGO_SEED") else None,
+        "memory_store_path": DEFAULT_STORE_PATH,
+        "asset_store_path": DEFAULT_ASSET_DIR,
+        "slack_min_interval": 1.0,
+        "discussion_poll_interval": 5,
+    }
+
+
+def build_simulation(settings):
+    """Creates the agents, the Dictator and the services they share; returns them by name."""
+    client = registry.slack(settings["slack_token"])  # Same client object the CEO posts with
+    llm_cache = LLMCache() if settings["llm_cache"] else None
+    streaming = settings["streaming"]
+    # Agents queue their posts here instead of waiting on Slack; delivery happens on per-channel workers
+    outbox = SlackOutbox(min_interval=settings["slack_min_interval"])
+    # Durable memory every agent writes to, so it survives restarts and can be queried across agents
+    memory_store = MemoryStore(settings["memory_store_path"])
+    # Generated images are kept locally by content hash, so repeated generations don't go back to Replicate
+    asset_store = AssetStore(settings["asset_store_path"])
+    #ceo_slack_id = os.getenv("CEO_SLACK_ID")  # The Slack ID for the CEO
+
+    # Initialize agents
+    channels = settings["channels"]
+    ceo_agent = CEO(name="Ian Korovinsky", id=ceo_slack_id, cohere_api_key=settings["cohere_api_key"], slack_token=settings["slack_token"], llm_cache=llm_cache, streaming=streaming, outbox=outbox, memory_store=memory_store, channels=channels, market=settings["market"])
+    cto_agent = CTOAgent(name="Elijah Kurien", id=cto_slack_id, cohere_api_key=settings["cohere_api_key"], slack_token=settings["cto_slack_token"], github_repo_path=settings["repo_path"], github_token=settings["github_token"], llm_cache=llm_cache, streaming=streaming, outbox=outbox, memory_store=memory_store, channels=channels, stream_edits=settings["stream_edits"], shard_edits=settings["shard_edits"])
+    # Initialize the Marketer agent
+    marketer_agent = Marketer(
+        name="Lily Zhang",
+        id=marketer_slack_id,
+        role="Marketing Specialist",
+        cohere_api_key=settings["cohere_api_key"],
+        slack_token=settings["marketer_slack_token"],
+        flux_token=settings["replicate_api_token"],
+        llm_cache=llm_cache,
+        streaming=streaming,
+        outbox=outbox,
+        memory_store=memory_store,
+        channels=channels,
+        asset_store=asset_store,
+        logo_variants=settings["logo_variants"],
+        logo_seed=settings["logo_seed"]
+    )
+
+    employees = {
+        ceo_agent.id: ceo_agent,
+        cto_agent.id: cto_agent,
+        marketer_agent.id: marketer_agent
+    }
+
+    roles_to_agents = {
+        "CEO": ceo_agent,
+        "CTO": cto_agent,
+        "Marketer": marketer_agent
+    }
+
+    # With an app-level token, discussions are driven by Socket Mode events instead of polling history
+    event_source = None
+    if settings["slack_app_token"]:
+        event_source = SocketModeEventSource(app_token=settings["slack_app_token"], web_client=client)
+        event_source.start()
+
+    print("\n\nVERY START:", employees)
+    #print(employees)
+    dictator = Dictator(name="Dictator", cohere_api_key=settings["cohere_api_key"], employees=employees, channel_id=channels["discussion"], slack_client=client, roles_to_agents=roles_to_agents, event_source=event_source, llm_cache=llm_cache, speculative_drafts=settings["speculative_drafts"], discussion_poll_interval=settings["discussion_poll_interval"])
+
+    return {
+        "ceo": ceo_agent,
+        "cto": cto_agent,
+        "marketer": marketer_agent,
+        "dictator": dictator,
+        "outbox": outbox,
+        "memory_store": memory_store,
+        "event_source": event_source,
+        "channel_id": channels["discussion"],
+    }
+
+
+def shutdown(simulation):
+    """Delivers what's still queued, closes the shared services and returns the outbox metrics."""
+    if simulation["event_source"] is not None:
+        simulation["event_source"].stop()
+
+    simulation["dictator"].close()
+    simulation["outbox"].close()
+    simulation["memory_store"].close()
+    outbox_metrics = simulation["outbox"].metrics()
+    print(f"Slack outbox: {outbox_metrics['delivered']} delivered, {outbox_metrics['failed']} failed, "
+          f"{outbox_metrics['retries']} retries, p95 delivery latency {outbox_metrics['latency_p95']}")
+    return outbox_metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Runs the startup simulation.")
+    parser.add_argument("--profile", action="store_true", help="Trace every external call and print where the time went")
+    parser.add_argument("--trace-dir", default=DEFAULT_TRACE_DIR, help="Where --profile writes its JSONL and Chrome traces")
+    args = parser.parse_args(argv)
+    if args.profile:
+        tracer.enable()
+
+    simulation = build_simulation(load_settings())
+
+    # CEO executes a task (e.g., setting up company goals)
+    # simulation["ceo"].take_instruction("the AI-driven healthcare market")
+
+    # Independent events (e.g. the website changes and the logo) run side by side
+    simulation["dictator"].run_events(simulation["channel_id"])
+
+    shutdown(simulation)
+
+    # Connections opened vs. requests served shows whether sockets were reused during the run
+    for provider, stats in registry.report().items():
+        print(f"{provider}: {stats['requests']} requests over {stats['connections_opened']} connections ({stats['tls_handshakes']} TLS handshakes)")
+
+    if args.profile:
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        jsonl_path = os.path.join(args.trace_dir, f"trace-{stamp}.jsonl")
+        chrome_path = os.path.join(args.trace_dir, f"trace-{stamp}.json")
+        tracer.export_jsonl(jsonl_path)
+        tracer.export_chrome(chrome_path)
+        print(tracer.summary())
+        print(f"Spans written to {jsonl_path}; load {chrome_path} in chrome://tracing or ui.perfetto.dev")
+
+
+if __name__ == "__main__":
+    main()
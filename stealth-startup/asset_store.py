@@ -0,0 +1,125 @@
+import hashlib
+import json
+import mimetypes
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "assets")
+
+
+class AssetStore:
+    """Content-addressed store for generated images, shared by every agent and process that opens it.
+
+    Files live under objects/<first two hex digits>/<sha256><ext>, so identical outputs are stored once. An index
+    maps each (model, prompt, seed, params) generation to its file, so repeating a generation skips the provider.
+    """
+
+    def __init__(self, root=DEFAULT_ASSET_DIR):
+        self.root = root
+        self.hits = 0
+        self.misses = 0
+        self.duplicates = 0  # New generations whose bytes were already stored
+        self._local = threading.local()  # sqlite connections can't be shared between threads
+
+        os.makedirs(os.path.join(self.root, "objects"), exist_ok=True)
+        with self._connection() as db:
+            db.execute("""CREATE TABLE IF NOT EXISTS objects (
+                digest TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                content_type TEXT,
+                created_at REAL NOT NULL
+            )""")
+            db.execute("""CREATE TABLE IF NOT EXISTS generations (
+                key TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                model TEXT NOT NULL,
+                prompt TEXT NOT NULL,
+                seed INTEGER,
+                source_url TEXT,
+                created_at REAL NOT NULL
+            )""")
+
+    def _connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(os.path.join(self.root, "index.sqlite3"), timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    @staticmethod
+    def make_key(model, prompt, seed, params=None):
+        payload = json.dumps({"model": model, "prompt": prompt, "seed": seed, "params": params or {}}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def lookup(self, model, prompt, seed, params=None):
+        """The stored asset for this exact generation, or None if it was never stored (or its file is gone)."""
+        db = self._connection()
+        row = db.execute(
+            "SELECT g.digest, o.path, o.size, o.content_type, g.source_url FROM generations g "
+            "JOIN objects o ON o.digest = g.digest WHERE g.key = ?",
+            (self.make_key(model, prompt, seed, params),),
+        ).fetchone()
+        if row is None or not os.path.exists(os.path.join(self.root, row[1])):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self._asset(*row)
+
+    def put(self, model, prompt, seed, data, source_url=None, content_type=None, params=None):
+        """Stores the bytes of a generation (once per distinct content) and indexes the generation to them."""
+        digest = hashlib.sha256(data).hexdigest()
+        extension = mimetypes.guess_extension(content_type or "") or os.path.splitext(source_url or "")[1] or ".bin"
+        db = self._connection()
+        now = time.time()
+
+        row = db.execute("SELECT path FROM objects WHERE digest = ?", (digest,)).fetchone()
+        if row is not None and os.path.exists(os.path.join(self.root, row[0])):
+            path = row[0]
+            self.duplicates += 1
+        else:
+            path = os.path.join("objects", digest[:2], digest + extension)
+            full_path = os.path.join(self.root, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            # Write then rename, so another process never reads a half-written file
+            temp_path = f"{full_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, full_path)
+
+        with db:
+            db.execute(
+                "INSERT OR REPLACE INTO objects (digest, path, size, content_type, created_at) VALUES (?, ?, ?, ?, ?)",
+                (digest, path, len(data), content_type, now),
+            )
+            db.execute(
+                "INSERT OR REPLACE INTO generations (key, digest, model, prompt, seed, source_url, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.make_key(model, prompt, seed, params), digest, model, prompt, seed, source_url, now),
+            )
+        return self._asset(digest, path, len(data), content_type, source_url)
+
+    def _asset(self, digest, path, size, content_type, source_url):
+        return {
+            "digest": digest,
+            "path": os.path.join(self.root, path),
+            "size": size,
+            "content_type": content_type,
+            "url": source_url,
+        }
+
+    def stats(self):
+        db = self._connection()
+        objects, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM objects").fetchone()
+        generations = db.execute("SELECT COUNT(*) FROM generations").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "duplicates": self.duplicates,
+            "objects": objects,
+            "generations": generations,
+            "bytes": size,
+        }
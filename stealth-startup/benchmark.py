@@ -0,0 +1,409 @@
+"""Offline end-to-end benchmark of the app.py flow.
+
+Runs the CEO stages and every Dictator event (discussion, CTO edit and commit, Marketer logo) against fake
+Cohere, Groq, Slack and Replicate clients with configurable latency, jitter and error rates, then reports
+wall time, per-phase latency percentiles and calls per provider, and compares them with a stored baseline.
+
+    python benchmark.py --runs 5                      # report and compare with benchmark_baseline.json
+    python benchmark.py --runs 5 --save-baseline      # record a new baseline
+    python benchmark.py --edit-format both            # compare full-file and SEARCH/REPLACE edits
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import math
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+import app
+from agent import DEFAULT_CHANNELS
+from clients import registry
+from fakes import FakeCohereClient, FakeGroqClient, FakeLatency, FakeReplicateClient, FakeSlackClient, FakeSlackWorkspace
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+# Tokens the fakes are installed under; nothing with these tokens ever leaves the process
+TOKENS = {
+    "cohere": "benchmark-cohere",
+    "groq": "benchmark-groq",
+    "replicate": "benchmark-replicate",
+    "ceo_slack": "benchmark-slack-ceo",
+    "cto_slack": "benchmark-slack-cto",
+    "marketer_slack": "benchmark-slack-marketer",
+}
+
+PAGE = """import Header from '../components/Header';
+import Footer from '../components/Footer';
+import Features from '../components/Features';
+
+export default function Home() {
+  return (
+    <main className="flex min-h-screen flex-col items-center justify-between p-24">
+      <Header />
+      <h1 className="text-4xl font-bold">Welcome to Echo</h1>
+      <Features />
+      <Footer />
+    </main>
+  )
+}
+"""
+
+LAYOUT = """import './globals.css';
+
+export default function RootLayout({ children }) {
+  return (
+    <html lang="en">
+      <body>{children}</body>
+    </html>
+  )
+}
+"""
+
+
+def component(name, imports=()):
+    lines = [f"import {dependency} from './{dependency}';" for dependency in imports]
+    lines += ["", f"export default function {name}() {{", "  return (", f"    <div className=\"{name.lower()}\">",
+              *[f"      <{dependency} />" for dependency in imports], f"      <p>{name}</p>", "    </div>", "  )", "}", ""]
+    return "\n".join(lines)
+
+
+def make_project(path, filler_components=20):
+    """A small Next.js-shaped git repository for the CTO to edit."""
+    files = {
+        "app/page.js": PAGE,
+        "app/layout.js": LAYOUT,
+        "app/globals.css": "body { margin: 0; }\n",
+        "components/Header.js": component("Header", ["Logo"]),
+        "components/Logo.js": component("Logo"),
+        "components/Footer.js": component("Footer"),
+        "components/Features.js": component("Features", [f"Feature{i}" for i in range(3)]),
+    }
+    for i in range(filler_components):
+        files[f"components/Feature{i}.js"] = component(f"Feature{i}")
+
+    for rel_path, content in files.items():
+        full_path = os.path.join(path, rel_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w", encoding="utf-8") as file:
+            file.write(content)
+
+    for command in (["git", "init", "-q"], ["git", "config", "user.name", "Benchmark"],
+                    ["git", "config", "user.email", "benchmark@example.com"], ["git", "add", "-A"],
+                    ["git", "commit", "-q", "-m", "Initial commit"]):
+        subprocess.run(command, cwd=path, check=True, capture_output=True)
+
+
+def cohere_responder(seed, words=40):
+    rng = random.Random(seed)
+    counter = itertools.count()
+
+    def respond(prompt):
+        if "top 3 employees" in prompt:
+            # Routing call: a shuffled pick of the IDs offered in the prompt
+            ids = re.findall(r"- ID: (\S+)", prompt)
+            rng.shuffle(ids)
+            employees = [{"id": employee_id, "response_type": "message"} for employee_id in ids[:3]]
+            return json.dumps({"employees": employees, "progress": 0, "value": "pricing for dispatch centres"})
+        n = next(counter)
+        return " ".join(f"point{(n + i) % 97}" for i in range(words))
+
+    return respond
+
+
+def groq_responder(project_path):
+    """Edits the homepage heading in whichever format the prompt asks for, reading the file as it is now."""
+    counter = itertools.count(1)
+
+    def respond(prompt):
+        if "List the files that must be changed" in prompt:
+            return json.dumps({"files": [{"path": "app/page.js", "purpose": "Update the homepage heading"}]})
+        with open(os.path.join(project_path, "app/page.js"), "r", encoding="utf-8") as file:
+            page = file.read()
+        heading = next(line for line in page.splitlines() if "<h1" in line)
+        new_heading = f'      <h1 className="text-5xl font-extrabold tracking-tight">Echo, revision {next(counter)}</h1>'
+
+        if "SEARCH/REPLACE" in prompt:
+            return f"app/page.js\n<<<<<<< SEARCH\n{heading}\n=======\n{new_heading}\n>>>>>>> REPLACE\n"
+        return json.dumps({"app/page.js": {"original": page, "updated": page.replace(heading, new_heading)}})
+
+    return respond
+
+
+def install_fakes(config, seed, project_path):
+    def latency(offset):
+        return FakeLatency(config["latency"], config["jitter"], config["error_rate"], seed=seed * 10 + offset)
+
+    workspace = FakeSlackWorkspace()
+    fakes = {
+        "cohere": FakeCohereClient(cohere_responder(seed), token_delay=config["token_delay"], latency=latency(1)),
+        "groq": FakeGroqClient(groq_responder(project_path), token_delay=config["token_delay"], latency=latency(2)),
+        "replicate": FakeReplicateClient(latency=latency(3)),
+        "slack": [
+            FakeSlackClient(app.ceo_slack_id, workspace, latency(4)),
+            FakeSlackClient(app.cto_slack_id, workspace, latency(5)),
+            FakeSlackClient(app.marketer_slack_id, workspace, latency(6)),
+        ],
+    }
+    registry.install("cohere", TOKENS["cohere"], fakes["cohere"])
+    registry.install("groq", TOKENS["groq"], fakes["groq"])
+    registry.install("replicate", TOKENS["replicate"], fakes["replicate"])
+    for token, fake in zip(("ceo_slack", "cto_slack", "marketer_slack"), fakes["slack"]):
+        registry.install("slack", TOKENS[token], fake)
+    return fakes
+
+
+def offline_settings(project_path, memory_store_path, config):
+    """app.build_simulation settings that point every provider at the installed fakes."""
+    os.environ["GROQ_API_KEY"] = TOKENS["groq"]  # SWEAgent reads its key from the environment
+    return {
+        "cohere_api_key": TOKENS["cohere"],
+        "slack_token": TOKENS["ceo_slack"],
+        "cto_slack_token": TOKENS["cto_slack"],
+        "marketer_slack_token": TOKENS["marketer_slack"],
+        "replicate_api_token": TOKENS["replicate"],
+        "repo_path": project_path,
+        "channels": dict(DEFAULT_CHANNELS),
+        "market": "the AI-driven healthcare market",
+        "github_token": None,  # Commits stay local
+        "slack_app_token": None,
+        "llm_cache": False,
+        "streaming": config["streaming"],
+        "speculative_drafts": config["speculative_drafts"],
+        "stream_edits": config.get("stream_edits", False),
+        "shard_edits": config.get("shard_edits", False),
+        "logo_variants": config.get("logo_variants", 1),
+        "logo_seed": config.get("logo_seed"),
+        "memory_store_path": memory_store_path,
+        # Next to the memory store, so runs sharing a directory (a sweep) share their assets too
+        "asset_store_path": os.path.join(os.path.dirname(memory_store_path), "assets"),
+        "slack_min_interval": config["slack_min_interval"],
+        "discussion_poll_interval": config["poll_interval"],
+    }
+
+
+def run_once(config, seed):
+    """One full simulation; returns its timings, provider calls and edit stats."""
+    with tempfile.TemporaryDirectory() as workdir:
+        project_path = os.path.join(workdir, "project")
+        make_project(project_path)
+        fakes = install_fakes(config, seed, project_path)
+
+        settings = offline_settings(project_path, os.path.join(workdir, "memory.sqlite3"), config)
+
+        phases = {}
+        failures = []  # Phases that raised, e.g. from injected provider errors
+
+        def timed(name, step):
+            phase_started = time.perf_counter()
+            try:
+                return step()
+            except Exception as e:
+                failures.append(f"{name}: {e}")
+            finally:
+                phases[name] = time.perf_counter() - phase_started
+
+        output = sys.stdout if config["verbose"] else io.StringIO()
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(output):
+            simulation = app.build_simulation(settings)
+            simulation["cto"].swe_agent.edit_format = config["edit_format"]
+            phases["setup"] = time.perf_counter() - started
+
+            try:
+                timed("ceo_stages", lambda: simulation["ceo"].take_instruction("the AI-driven healthcare market"))
+                report = timed("events", lambda: simulation["dictator"].run_events(simulation["channel_id"]))
+                if report is not None:
+                    for timing in report.timings.values():
+                        phases[f"event: {timing.name}"] = timing.duration
+                        if timing.status != "done":
+                            failures.append(f"event: {timing.name}: {timing.status}")
+            finally:
+                # Always drain the outbox and memory store before the temporary directory goes away
+                outbox_metrics = timed("shutdown", lambda: app.shutdown(simulation))
+        wall_time = time.perf_counter() - started
+
+        index_path = simulation["cto"].swe_agent.index.index_path
+        if os.path.exists(index_path):
+            os.remove(index_path)  # The temporary checkout is gone, so its index is too
+
+    calls = {provider: len(fake.calls) for provider, fake in fakes.items() if provider != "slack"}
+    calls["slack"] = sum(len(fake.calls) for fake in fakes["slack"])
+    provider_latencies = {provider: [seconds for _, seconds in fake.latencies] for provider, fake in fakes.items() if provider != "slack"}
+    provider_latencies["slack"] = [seconds for fake in fakes["slack"] for _, seconds in fake.latencies]
+
+    return {
+        "wall_time": wall_time,
+        "phases": phases,
+        "calls": calls,
+        "provider_latencies": provider_latencies,
+        "failures": failures,
+        "edit_stats": dict(simulation["cto"].swe_agent.edit_stats),
+        "outbox": {key: (outbox_metrics or {}).get(key, 0) for key in ("delivered", "failed", "retries")},
+    }
+
+
+def percentiles(values):
+    values = sorted(values)
+    if not values:
+        return {"p50": None, "p95": None, "max": None, "count": 0}
+
+    def pick(p):
+        # Nearest rank, so the median of two runs is the faster one rather than the slower
+        return values[max(0, math.ceil(p * len(values)) - 1)]
+
+    return {"p50": pick(0.5), "p95": pick(0.95), "max": values[-1], "count": len(values)}
+
+
+def summarize(results):
+    phase_names = sorted({name for result in results for name in result["phases"]})
+    providers = sorted({provider for result in results for provider in result["calls"]})
+    return {
+        "runs": len(results),
+        "wall_time": percentiles([result["wall_time"] for result in results]),
+        "phases": {name: percentiles([r["phases"][name] for r in results if name in r["phases"]]) for name in phase_names},
+        "calls": {provider: sum(r["calls"].get(provider, 0) for r in results) / len(results) for provider in providers},
+        "provider_latency": {
+            provider: percentiles([seconds for r in results for seconds in r["provider_latencies"].get(provider, [])])
+            for provider in providers
+        },
+        "failures": sum(len(result["failures"]) for result in results),
+        "edit_output_tokens": sum(r["edit_stats"]["output_tokens"] for r in results) / len(results),
+        "edit_files_rejected": sum(r["edit_stats"]["files_rejected"] for r in results) / len(results),
+        "slack_retries": sum(r["outbox"]["retries"] for r in results) / len(results),
+    }
+
+
+def compare(summary, baseline, tolerance=0.2, min_delta=0.05):
+    """Regressions against a baseline summary: slower p50 times beyond the tolerance, or more provider calls."""
+    regressions = []
+
+    def check_time(label, current, previous):
+        if current is None or previous is None:
+            return
+        if current > previous * (1 + tolerance) + min_delta:
+            regressions.append(f"{label}: p50 {current:.3f}s vs baseline {previous:.3f}s")
+
+    check_time("wall time", summary["wall_time"]["p50"], baseline["wall_time"]["p50"])
+    for name, stats in summary["phases"].items():
+        if name in baseline["phases"]:
+            check_time(name, stats["p50"], baseline["phases"][name]["p50"])
+    for provider, calls in summary["calls"].items():
+        previous = baseline["calls"].get(provider)
+        if previous is not None and calls > previous * (1 + tolerance):
+            regressions.append(f"{provider} calls: {calls:.1f} per run vs baseline {previous:.1f}")
+    if summary["failures"] > baseline.get("failures", 0):
+        regressions.append(f"failures: {summary['failures']} vs baseline {baseline.get('failures', 0)}")
+    return regressions
+
+
+def format_summary(edit_format, summary):
+    def seconds(value):
+        return "     -" if value is None else f"{value:6.3f}"
+
+    lines = [f"Edit format '{edit_format}': {summary['runs']} runs, wall time p50 {seconds(summary['wall_time']['p50'])}s "
+             f"p95 {seconds(summary['wall_time']['p95'])}s"]
+    lines.append("  Phase                                              p50      p95      max")
+    for name, stats in summary["phases"].items():
+        lines.append(f"  {name[:48]:<48} {seconds(stats['p50'])}s {seconds(stats['p95'])}s {seconds(stats['max'])}s")
+    lines.append("  Provider    calls/run  call p50  call p95")
+    for provider, calls in summary["calls"].items():
+        latency = summary["provider_latency"][provider]
+        lines.append(f"  {provider:<10} {calls:10.1f}   {seconds(latency['p50'])}s  {seconds(latency['p95'])}s")
+    lines.append(f"  Edit output tokens/run {summary['edit_output_tokens']:.0f}, rejected files/run {summary['edit_files_rejected']:.1f}, "
+                 f"Slack retries/run {summary['slack_retries']:.1f}, failed phases/events {summary['failures']}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of the simulation.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05, help="Base delay of every fake provider call, in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Uniform +/- jitter added to each call, in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability a provider call fails (Slack posts get a 429)")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Extra delay per generated word")
+    parser.add_argument("--edit-format", choices=("full", "hunks", "both"), default="full")
+    parser.add_argument("--speculative-drafts", type=int, default=0)
+    parser.add_argument("--streaming", action="store_true")
+    parser.add_argument("--stream-edits", action="store_true", help="Write each CTO file edit while the completion streams")
+    parser.add_argument("--shard-edits", action="store_true", help="Plan the CTO's files first, then generate them in parallel (overrides --stream-edits)")
+    parser.add_argument("--logo-variants", type=int, default=1, help="Logo seeds the Marketer renders side by side")
+    parser.add_argument("--poll-interval", type=float, default=0.05, help="Discussion history poll interval")
+    parser.add_argument("--slack-min-interval", type=float, default=0.0, help="Outbox spacing between posts per channel")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown before flagging a regression")
+    parser.add_argument("--verbose", action="store_true", help="Show the simulation's own output")
+    args = parser.parse_args(argv)
+
+    formats = ("full", "hunks") if args.edit_format == "both" else (args.edit_format,)
+    summaries = {}
+    for edit_format in formats:
+        config = {
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "error_rate": args.error_rate,
+            "token_delay": args.token_delay,
+            "edit_format": edit_format,
+            "speculative_drafts": args.speculative_drafts,
+            "streaming": args.streaming,
+            "stream_edits": args.stream_edits,
+            "shard_edits": args.shard_edits,
+            "logo_variants": args.logo_variants,
+            "poll_interval": args.poll_interval,
+            "slack_min_interval": args.slack_min_interval,
+            "verbose": args.verbose,
+        }
+        results = [run_once(config, args.seed + run) for run in range(args.runs)]
+        summaries[edit_format] = summarize(results)
+        print(format_summary(edit_format, summaries[edit_format]))
+
+    if len(summaries) == 2:
+        full, hunks = summaries["full"], summaries["hunks"]
+        saved = full["edit_output_tokens"] - hunks["edit_output_tokens"]
+        print(f"Hunks vs full: {saved:.0f} fewer output tokens per run "
+              f"({hunks['edit_output_tokens']:.0f} vs {full['edit_output_tokens']:.0f})")
+
+    settings = {key: value for key, value in vars(args).items() if key not in ("baseline", "save_baseline", "verbose", "tolerance")}
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump({"settings": settings, "summaries": summaries}, file, indent=2, sort_keys=True)
+            file.write("\n")
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against; run with --save-baseline to record one.")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as file:
+        baseline = json.load(file)
+    def compared(recorded):
+        # The run count only changes how noisy the percentiles are, not what is being measured
+        return {key: value for key, value in recorded.items() if key != "runs"}
+
+    if compared(baseline.get("settings", {})) != compared(settings):
+        print("Warning: baseline was recorded with different settings, so differences may not be regressions.")
+
+    regressions = []
+    for edit_format, summary in summaries.items():
+        if edit_format in baseline["summaries"]:
+            regressions += [f"[{edit_format}] {r}" for r in compare(summary, baseline["summaries"][edit_format], args.tolerance)]
+    if regressions:
+        print("Regressions against the baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("No regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+import threading
+
+import httpx
+from slack_sdk import WebClient
+
+from tracing import tracer
+
+
+class ProviderStats:
+    def __init__(self):
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def increment(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "connections_opened": self.connections_opened,
+                "tls_handshakes": self.tls_handshakes,
+                "requests": self.requests,
+            }
+
+
+class CountingTransport(httpx.HTTPTransport):
+    """Connection-pooled transport that counts requests and the sockets it actually opens."""
+
+    def __init__(self, stats, **kwargs):
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    def handle_request(self, request):
+        self.stats.increment("requests")
+        request.extensions["trace"] = self._trace
+        return super().handle_request(request)
+
+    def _trace(self, event_name, info):
+        if event_name == "connection.connect_tcp.complete":
+            self.stats.increment("connections_opened")
+        elif event_name == "connection.start_tls.complete":
+            self.stats.increment("tls_handshakes")
+
+
+class CountingWebClient(WebClient):
+    """Slack WebClient that records its API calls in the registry's counters."""
+
+    def __init__(self, stats, **kwargs):
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    def api_call(self, api_method, *args, **kwargs):
+        self.stats.increment("requests")
+        # slack_sdk's sync client is built on urllib, which opens a fresh connection for every call
+        self.stats.increment("connections_opened")
+        payload = kwargs.get("json") or kwargs.get("data") or kwargs.get("params") or {}
+        with tracer.span(f"slack.{api_method}", "slack", request_bytes=len(str(payload))) as span:
+            response = super().api_call(api_method, *args, **kwargs)
+            span.set(response_bytes=len(str(response.data)))
+            return response
+
+
+class ClientRegistry:
+    """Hands out one shared, connection-pooled client per provider and token for the whole process."""
+
+    def __init__(self, max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0, timeout=300.0):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry  # Seconds an idle socket stays open for reuse
+        self.timeout = timeout
+        self.stats = {}  # {provider: ProviderStats}
+        self._clients = {}  # {(provider, token): client}
+        self._http_clients = {}  # {provider: httpx.Client}
+        self._ssl_context = None
+        self._lock = threading.RLock()
+
+    def configure(self, **settings):
+        """Changes pool settings; only clients created afterwards pick them up."""
+        with self._lock:
+            for name, value in settings.items():
+                if not hasattr(self, name) or name.startswith("_"):
+                    raise ValueError(f"Unknown client setting: {name}")
+                setattr(self, name, value)
+
+    def _provider_stats(self, provider):
+        if provider not in self.stats:
+            self.stats[provider] = ProviderStats()
+        return self.stats[provider]
+
+    def _transport(self, provider):
+        if self._ssl_context is None:
+            # One context for every pool, so CA certificates are loaded once per process
+            self._ssl_context = httpx.create_ssl_context()
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+        return CountingTransport(self._provider_stats(provider), verify=self._ssl_context, limits=limits)
+
+    def _http_client(self, provider):
+        if provider not in self._http_clients:
+            self._http_clients[provider] = httpx.Client(transport=self._transport(provider), timeout=self.timeout)
+        return self._http_clients[provider]
+
+    def _get_or_create(self, provider, token, factory):
+        with self._lock:
+            key = (provider, token)
+            if key not in self._clients:
+                self._clients[key] = factory()
+            return self._clients[key]
+
+    def install(self, provider, token, client):
+        """Hands out a ready-made client (e.g. a benchmark fake) for this provider and token from now on."""
+        with self._lock:
+            self._clients[(provider, token)] = client
+
+    # SDKs are imported inside the factories, so a process that reuses or installs clients never pays for the import
+
+    def cohere(self, api_key):
+        def create():
+            import cohere
+
+            return cohere.Client(api_key, log_warning_experimental_features=False, httpx_client=self._http_client("cohere"))
+
+        return self._get_or_create("cohere", api_key, create)
+
+    def groq(self, api_key):
+        def create():
+            from groq import Groq
+
+            return Groq(api_key=api_key, http_client=self._http_client("groq"))
+
+        return self._get_or_create("groq", api_key, create)
+
+    def replicate(self, api_token):
+        def create():
+            import replicate
+
+            # replicate.Client builds its own httpx.Client (for its auth headers) but accepts our pooled transport
+            return replicate.Client(api_token=api_token, transport=self._transport("replicate"))
+
+        return self._get_or_create("replicate", api_token, create)
+
+    def http(self, provider):
+        """Plain pooled httpx.Client, e.g. for downloading the files a provider generated."""
+        return self._get_or_create("http", provider, lambda: self._http_client(provider))
+
+    def slack(self, token):
+        return self._get_or_create("slack", token, lambda: CountingWebClient(self._provider_stats("slack"), token=token))
+
+    def report(self):
+        with self._lock:
+            return {provider: stats.as_dict() for provider, stats in self.stats.items()}
+
+    def close(self):
+        with self._lock:
+            for http_client in self._http_clients.values():
+                http_client.close()
+            self._http_clients.clear()
+            self._clients.clear()
+
+
+# Process-wide registry used by the agents
+registry = ClientRegistry()
@@ -0,0 +1,102 @@
+import json
+import math
+import re
+from collections import Counter
+
+from import_graph import ImportGraph
+
+TOKEN_PATTERN = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+")
+STOPWORDS = {
+    "the", "and", "for", "with", "this", "that", "from", "into", "make", "more", "new", "add", "use",
+    "import", "export", "default", "function", "return", "const", "class", "name", "div",
+}
+# Entry points get a small head start so vague tasks ("make it more modern") still see the page
+ENTRY_POINTS = ("app/page", "app/layout")
+
+
+def estimate_tokens(text):
+    """Rough llama3 token count (about four characters per token), good enough for budgeting."""
+    return math.ceil(len(text) / 4)
+
+
+def tokenize(text):
+    return [t for t in (token.lower() for token in TOKEN_PATTERN.findall(text)) if len(t) > 1 and t not in STOPWORDS]
+
+
+class ContextBuilder:
+    """Picks the files most relevant to a task and packs them into a fixed token budget for the prompt."""
+
+    def __init__(self, token_budget=3000, neighbour_weight=0.5, k1=1.5, b=0.75):
+        self.token_budget = token_budget
+        self.neighbour_weight = neighbour_weight  # Share of a hit's score passed on to files it imports or is imported by
+        self.k1 = k1
+        self.b = b
+
+    def rank(self, files, task_description):
+        """BM25 over path and source tokens, then import-graph neighbours of the hits are pulled up."""
+        documents = {path: tokenize(path) * 3 + tokenize(source) for path, source in files.items()}
+        if not documents:
+            return []
+
+        average_length = sum(len(tokens) for tokens in documents.values()) / len(documents) or 1
+        document_frequency = Counter()
+        for tokens in documents.values():
+            document_frequency.update(set(tokens))
+
+        query = set(tokenize(task_description))
+        scores = {}
+        for path, tokens in documents.items():
+            counts = Counter(tokens)
+            score = 0.0
+            for term in query:
+                if term not in counts:
+                    continue
+                idf = math.log(1 + (len(documents) - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+                tf = counts[term]
+                score += idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * len(tokens) / average_length))
+            scores[path] = score
+
+        graph = ImportGraph(files)
+        boosted = dict(scores)
+        for path, score in scores.items():
+            if score <= 0:
+                continue
+            for neighbour in graph.neighbours(path):
+                boosted[neighbour] = max(boosted[neighbour], score * self.neighbour_weight)
+
+        def sort_key(path):
+            return (-boosted[path], not path.startswith(ENTRY_POINTS), len(files[path]), path)
+
+        return sorted(files, key=sort_key)
+
+    def build(self, files, task_description, full_context=None):
+        """Returns (context text, report) with full sources for the top files and only paths for the rest.
+
+        full_context is what would have been sent without the builder and is only used to report the savings.
+        """
+        ranked = self.rank(files, task_description)
+        included = {}
+        listed = []
+        remaining = self.token_budget
+        for path in ranked:
+            cost = estimate_tokens(path) + estimate_tokens(files[path])
+            if cost <= remaining:
+                included[path] = files[path]
+                remaining -= cost
+            else:
+                listed.append(path)
+
+        context = f"Relevant files (full contents):\n{json.dumps(included)}"
+        if listed:
+            context += "\n\nOther files in the project (contents omitted):\n" + "\n".join(f"- {path}" for path in sorted(listed))
+
+        full_tokens = estimate_tokens(full_context if full_context is not None else json.dumps(files))
+        context_tokens = estimate_tokens(context)
+        report = {
+            "files_included": len(included),
+            "files_listed": len(listed),
+            "context_tokens": context_tokens,
+            "full_tokens": full_tokens,
+            "tokens_saved": max(full_tokens - context_tokens, 0),
+        }
+        return context, report
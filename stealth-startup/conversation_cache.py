@@ -0,0 +1,80 @@
+import threading
+from collections import OrderedDict, deque
+
+from slack_events import IGNORED_SUBTYPES
+
+
+class ChannelState:
+    def __init__(self, transcript_size, seen_size):
+        self.cursor = None  # ts of the newest message fetched so far; later fetches pass it as oldest=
+        self.transcript = deque(maxlen=transcript_size)  # Newest first, like conversations_history
+        self.seen = OrderedDict()  # Recent ts values, so a message pushed and also fetched is only handled once
+        self.seen_size = seen_size
+
+
+class ConversationCache:
+    """Per-channel Slack transcript that only fetches messages newer than the last one it saw."""
+
+    def __init__(self, slack_client, transcript_size=6, page_size=100, seen_size=1000):
+        self.slack = slack_client
+        self.transcript_size = transcript_size
+        self.page_size = page_size
+        self.seen_size = seen_size
+        self._channels = {}
+        self._lock = threading.Lock()
+        self.stats = {"fetches": 0, "empty_fetches": 0, "new_messages": 0, "duplicates": 0}
+
+    def _state(self, channel_id):
+        if channel_id not in self._channels:
+            self._channels[channel_id] = ChannelState(self.transcript_size, self.seen_size)
+        return self._channels[channel_id]
+
+    def fetch_new(self, channel_id):
+        """Fetches what was posted since the last fetch and returns the new messages, newest first.
+
+        The first fetch for a channel only reads the last transcript_size messages. Raises SlackApiError.
+        """
+        with self._lock:
+            state = self._state(channel_id)
+            cursor = state.cursor
+
+        if cursor is None:
+            response = self.slack.conversations_history(channel=channel_id, limit=self.transcript_size)
+        else:
+            # oldest= is exclusive, so the message at the cursor isn't returned again
+            response = self.slack.conversations_history(channel=channel_id, limit=self.page_size, oldest=cursor)
+
+        new = self.add(channel_id, response['messages'])
+        with self._lock:
+            self.stats["fetches"] += 1
+            if not new:
+                self.stats["empty_fetches"] += 1
+        return new
+
+    def add(self, channel_id, messages):
+        """Adds fetched or pushed messages to the transcript and returns the ones not seen before, newest first."""
+        new = []
+        with self._lock:
+            state = self._state(channel_id)
+            for message in sorted(messages, key=lambda m: float(m['ts'])):
+                ts = message['ts']
+                if state.cursor is None or float(ts) > float(state.cursor):
+                    state.cursor = ts
+                if ts in state.seen:
+                    self.stats["duplicates"] += 1
+                    continue
+                state.seen[ts] = True
+                if len(state.seen) > state.seen_size:
+                    state.seen.popitem(last=False)
+
+                if message.get('subtype') in IGNORED_SUBTYPES or not message.get('user'):
+                    continue
+                state.transcript.appendleft(message)
+                new.append(message)
+            self.stats["new_messages"] += len(new)
+        return new[::-1]
+
+    def transcript(self, channel_id):
+        """The last transcript_size messages of the channel, newest first."""
+        with self._lock:
+            return list(self._state(channel_id).transcript)
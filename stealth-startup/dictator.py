@@ -1,13 +1,19 @@
 import os
-import cohere
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
 from dotenv import load_dotenv
 from agent import CEO
+from scheduler import EventScheduler
+from conversation_cache import ConversationCache
+from clients import registry
+from tracing import tracer, usage_tokens
 import json
 import math
+import queue
 import random
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 """ 
 load_dotenv()
@@ -21,25 +27,39 @@ cohere_api_key = os.getenv("COHERE_API_KEY")
 ceo_agent = Agent(name="Alice", role="CEO", cohere_api_key=cohere_api_key) """
 
 class Event:
-    def __init__(self, name, roles, tool_used=False, metadata=None):
+    def __init__(self, name, roles, tool_used=False, metadata=None, depends_on=()):
         self.name = name  # The event's name, e.g., "Conduct market research"
         self.roles = roles  # A tuple or list of roles involved in the event, e.g., ("CEO", "CTO")
         self.tool_used = tool_used  # A flag indicating if a tool (like SWEAgent) is needed
         self.metadata = metadata or {}  # Optional additional metadata for the event
+        self.depends_on = tuple(depends_on)  # Names of events that must finish before this one starts
 
     def __repr__(self):
-        return f"Event(name={self.name}, roles={self.roles}, tool_used={self.tool_used}, metadata={self.metadata})"
+        return f"Event(name={self.name}, roles={self.roles}, tool_used={self.tool_used}, metadata={self.metadata}, depends_on={self.depends_on})"
 
 
 class Dictator:
-    def __init__(self, name, cohere_api_key, employees, channel_id, slack_client, roles_to_agents):
+    def __init__(self, name, cohere_api_key, employees, channel_id, slack_client, roles_to_agents, max_workers=4,
+                 event_source=None, discussion_turns=8, discussion_idle_timeout=60, llm_cache=None, speculative_drafts=0,
+                 discussion_poll_interval=5):
         self.current_event_index = 0
+        self.max_workers = max_workers  # Worker pool size for independent events
+        self.event_source = event_source  # Optional SlackEventSource; when set, discussions react to pushed messages instead of polling
+        self.discussion_turns = discussion_turns
+        self.discussion_idle_timeout = discussion_idle_timeout  # Seconds without a new message before a discussion ends
+        self.discussion_poll_interval = discussion_poll_interval  # Seconds between history polls without an event source
+        self.llm_cache = llm_cache  # Optional LLMCache for the routing call
+        self.speculative_drafts = speculative_drafts  # Replies drafted alongside the routing call; 0 waits for routing first
+        self.draft_stats = {"started": 0, "used": 0, "wasted": 0, "cancelled": 0}  # Cancelled drafts aren't also counted as wasted
+        self._stats_lock = threading.Lock()  # Events run on several threads, each starting and settling drafts
+        self._draft_pool = ThreadPoolExecutor(max_workers=speculative_drafts) if speculative_drafts else None
         self.cohere_api_key = cohere_api_key
         self.channel_id = channel_id
         self.employees = employees
         #self.channel_id = channel_id  # Replace with your actual Slack channel ID
         self.slack = slack_client
         self.roles_to_agents = roles_to_agents
+        self.conversations = ConversationCache(slack_client)  # Per-channel transcript; polls only fetch newer messages
 
          # Define events with metadata, assign roles and tool usage flags
         self.events = [
@@ -47,16 +67,38 @@ class Dictator:
             #Event(name="Discuss different viewpoints of the product derived from the market research step", roles=("CEO", "CTO"), tool_used=False),
             Event(name="Make changes to the website", roles=("CTO",), tool_used=True, metadata={"task": "Fix the formatting and improve the design. Make it more modern."}),
             Event(name="Design a new logo", roles=("Marketer",), tool_used=True, metadata={"task": "Design a new company logo"}),
-            Event(name="Discuss thoughts about the logo design", roles=("CTO", "CEO", "Marketer"), metadata={"CEO": "Your viewpoint should be that you don't like it.", "CTO": "Your viewpoint should be that you like it.", "Marketer": "Your viewpoint should be that you like it"}),
-            Event(name="Add the logo to the website", roles=("CTO",), tool_used=True, metadata={"task": "Integrate new logo into homepage"})
+            Event(name="Discuss thoughts about the logo design", roles=("CTO", "CEO", "Marketer"), metadata={"CEO": "Your viewpoint should be that you don't like it.", "CTO": "Your viewpoint should be that you like it.", "Marketer": "Your viewpoint should be that you like it"}, depends_on=("Design a new logo",)),
+            # Both CTO events edit the same checkout, so the second one waits for the first as well as the logo
+            Event(name="Add the logo to the website", roles=("CTO",), tool_used=True, metadata={"task": "Integrate new logo into homepage"}, depends_on=("Design a new logo", "Make changes to the website"))
         ]
 
         # Initialize Cohere Client
-        self.cohere_client = cohere.Client(self.cohere_api_key, log_warning_experimental_features=False)
+        self.cohere_client = registry.cohere(self.cohere_api_key)
+
+    def run_events(self, channel_id):
+        """Runs every event, overlapping the ones that don't depend on each other, and reports the timings."""
+        scheduler = EventScheduler(self.events, max_workers=self.max_workers)
+        report = scheduler.run(lambda event: self.process_event(event, channel_id))
+        print(report.summary())
+        if self.speculative_drafts:
+            with self._stats_lock:
+                stats = dict(self.draft_stats)
+            print(f"Speculative drafts: {stats['started']} started, {stats['used']} used, "
+                  f"{stats['wasted']} wasted, {stats['cancelled']} cancelled before starting")
+        history = self.conversations.stats
+        if history["fetches"]:
+            print(f"Slack history: {history['fetches']} fetches, {history['empty_fetches']} with nothing new, "
+                  f"{history['new_messages']} new messages")
+        return report
 
     # Employees = {id: ID, agent: Agent}
     def process_event(self, event, channel_id):
         """Processes a single event by assigning tasks to agents based on roles and tool flags."""
+        # Every span started while handling the event is tagged with its name
+        with tracer.context(event=event.name), tracer.span(event.name, "event"):
+            self._process_event(event, channel_id)
+
+    def _process_event(self, event, channel_id):
         print(f"Processing Event: {event.name}")
 
         # Fetch the latest messages from Slack for context
@@ -85,25 +127,68 @@ class Dictator:
     
 
     def initiate_discussion(self, event, channel_id):
+        if self.event_source is not None:
+            return self.listen_for_discussion(event, channel_id)
+
         counter = 0
-        while counter < 8:
-            time.sleep(5)
+        while counter < self.discussion_turns:
+            time.sleep(self.discussion_poll_interval)
             try:
-                response = self.slack.conversations_history(channel=channel_id, limit=6)
-                #print(response)
-                messages = response['messages']
-                if len(messages) > 0:
-                    self.process_message(messages)
+                new_messages = self.conversations.fetch_new(channel_id)
             except SlackApiError as e:
                 print(f"Error retrieving messages: {e.response['error']}")
-                messages = []
                 return
+            # Nothing posted since the last poll means nothing to route or answer
+            if new_messages:
+                self.process_message(self.conversations.transcript(channel_id), event)
             counter += 1
 
-    def process_message(self, messages):
-        prompt = self.build_prompt(messages)
-        response = self.cohere_client.chat(
-            message=prompt,
+    def listen_for_discussion(self, event, channel_id):
+        """Event-driven discussion: reply as soon as a message is pushed rather than polling history."""
+        inbox = queue.Queue()
+        unsubscribe = self.event_source.subscribe(channel_id, inbox.put)
+
+        try:
+            # Catch up on anything posted since the last look, then only react to pushed messages
+            turns = 0
+            try:
+                if self.conversations.fetch_new(channel_id):
+                    self.process_message(self.conversations.transcript(channel_id), event)
+                    turns += 1
+            except SlackApiError as e:
+                print(f"Error retrieving messages: {e.response['error']}")
+
+            while turns < self.discussion_turns:
+                try:
+                    message = inbox.get(timeout=self.discussion_idle_timeout)
+                except queue.Empty:
+                    print(f"No new messages for {self.discussion_idle_timeout}s, ending discussion.")
+                    break
+
+                # Fold in anything else that arrived while we were busy so one turn answers them all
+                batch = [message]
+                while not inbox.empty():
+                    batch.append(inbox.get_nowait())
+                if not self.conversations.add(channel_id, batch):
+                    continue  # Already seen, e.g. during the catch-up fetch
+
+                self.process_message(self.conversations.transcript(channel_id), event)
+                turns += 1
+        finally:
+            unsubscribe()
+
+    def process_message(self, messages, event=None):
+        # Draft the likeliest replies while the routing call is in flight, instead of after it
+        drafts = self.start_drafts(messages) if self.speculative_drafts else {}
+        try:
+            self.route_message(messages, event, drafts)
+        finally:
+            self.discard_drafts(drafts)
+
+    def route_message(self, messages, event, drafts):
+        prompt = self.build_prompt(messages, event)
+        response_text = self.chat_text(
+            prompt,
             temperature=0.5,
             max_tokens=600,
             response_format={
@@ -138,7 +223,7 @@ class Dictator:
 }
         )
         
-        response_json = json.loads(response.text)
+        response_json = json.loads(response_text)
         print("\n\n\n\n")
         print(response_json)
         print("\n\n\n\n")
@@ -158,23 +243,97 @@ class Dictator:
             # Process the employee's information
             print(f"CURRENTLY AT {self.get_employee_name(employee_id)}")
             if employee_id in self.employees and employee_id != messages[0]['user']:
-                prompt = f"""You are {self.get_employee_name(employee_id)}, the {self.employees[employee_id].role} of Echo. Echo is a 911 dispatching service that uses AI to help manage emergency calls. You are responding to a message from a team member. You are a technical person with management of the codebase. Your current goal is to do Market Research and evaluate (1) Customers (2) Industry and (3) Market insights and the conversation should NOT stray away from this topic. If it does, take initiative to come back to it until it is complete."""
-                
-                prompt += "\n\nThis is the previous conversation. Continue on after the last message"
-                for message in messages[::-1]:
-                    prompt += f"\n{self.get_employee_name(message['user'])}: {message['text']}"
-                
-                prompt += f"""\n\nMake your message short and informal. Only write the response text without quotations and do not give any prefix. 
-                Remember that you are the employee of Echo, an AI-driven service to help manage dispatching. Do not repeat from the past message. Only provide a response for the person, do not include any preamble describing the response. Do not add comments, it is very important that you only provide the final output without any additional comments or remarks. Do not meeting or dicussing. Speak casually, you are close with everyone as you are already all on the team. Do not use the word Great in your response."""
+                prompt = self.responder_prompt(employee_id, messages)
                 print("\n\n", prompt)
-                self.employees[employee_id].generate_message(prompt)
+                self.reply(employee_id, prompt, drafts.pop(employee_id, None))
                 break
             else:
                 print(f"Employee with ID {employee_id} not found.")
-            
 
-        
-    def build_prompt(self, messages):
+    def responder_prompt(self, employee_id, messages):
+        prompt = f"""You are {self.get_employee_name(employee_id)}, the {self.employees[employee_id].role} of Echo. Echo is a 911 dispatching service that uses AI to help manage emergency calls. You are responding to a message from a team member. You are a technical person with management of the codebase. Your current goal is to do Market Research and evaluate (1) Customers (2) Industry and (3) Market insights and the conversation should NOT stray away from this topic. If it does, take initiative to come back to it until it is complete."""
+
+        prompt += "\n\nThis is the previous conversation. Continue on after the last message"
+        for message in messages[::-1]:
+            prompt += f"\n{self.get_employee_name(message['user'])}: {message['text']}"
+
+        prompt += f"""\n\nMake your message short and informal. Only write the response text without quotations and do not give any prefix. 
+                Remember that you are the employee of Echo, an AI-driven service to help manage dispatching. Do not repeat from the past message. Only provide a response for the person, do not include any preamble describing the response. Do not add comments, it is very important that you only provide the final output without any additional comments or remarks. Do not meeting or dicussing. Speak casually, you are close with everyone as you are already all on the team. Do not use the word Great in your response."""
+        return prompt
+
+    def likely_responders(self, messages):
+        """Guesses who routing will pick: anyone named in the last message, then whoever has been quiet longest."""
+        last = messages[0]
+        speakers = [message.get('user') for message in messages]
+        candidates = [employee_id for employee_id in self.employees if employee_id != last.get('user')]
+
+        def rank(employee_id):
+            mentioned = self.employees[employee_id].name.lower() in last.get('text', '').lower()
+            last_spoke = speakers.index(employee_id) if employee_id in speakers else len(speakers)
+            return (not mentioned, -last_spoke)
+
+        return sorted(candidates, key=rank)[:self.speculative_drafts]
+
+    def can_draft(self, employee_id):
+        agent = self.employees[employee_id]
+        # A streamed reply is generated while it posts, so drafting it up front would stop it streaming
+        return hasattr(agent, "draft_message") and hasattr(agent, "publish_message") and not agent.streaming
+
+    def start_drafts(self, messages):
+        drafts = {}
+        for employee_id in self.likely_responders(messages):
+            if not self.can_draft(employee_id):
+                continue
+            prompt = self.responder_prompt(employee_id, messages)
+            drafts[employee_id] = self._draft_pool.submit(tracer.bind(self.employees[employee_id].draft_message), prompt)
+            self._count_draft("started")
+        return drafts
+
+    def reply(self, employee_id, prompt, draft=None):
+        """Publishes the speculative draft when there is a usable one, otherwise generates the reply now."""
+        agent = self.employees[employee_id]
+        if draft is not None:
+            try:
+                result = draft.result()
+            except Exception as e:
+                print(f"Draft for {agent.name} failed, generating again: {e}")
+                result = None
+            if result is not None:
+                self._count_draft("used")
+                agent.publish_message(result)
+                return
+            self._count_draft("wasted")
+        agent.generate_message(prompt)
+
+    def _count_draft(self, outcome):
+        with self._stats_lock:
+            self.draft_stats[outcome] += 1
+
+    def discard_drafts(self, drafts):
+        # Drafts still queued are cancelled; ones already running finish in the background and are dropped
+        for draft in drafts.values():
+            self._count_draft("cancelled" if draft.cancel() else "wasted")
+        drafts.clear()
+
+    def close(self):
+        """Stops the draft pool; drafts still queued are dropped."""
+        if self._draft_pool is not None:
+            self._draft_pool.shutdown(wait=True, cancel_futures=True)
+
+    def chat_text(self, prompt, **params):
+        """Runs a Cohere chat call, going through the response cache when the Dictator has one."""
+        def compute():
+            with tracer.span("cohere.chat", "cohere", agent="Dictator", prompt_bytes=len(prompt)) as span:
+                response = self.cohere_client.chat(message=prompt, **params)
+                prompt_tokens, completion_tokens = usage_tokens(response)
+                span.set(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, completion_bytes=len(response.text))
+                return response.text
+
+        if self.llm_cache is None:
+            return compute()
+        return self.llm_cache.get_or_compute("chat", None, prompt, params, compute)
+
+    def build_prompt(self, messages, event=None):
         prompt = """You are the manager of a startup. Based on the input provided, determine the top 3 employees that should respond. The employee can have either a tool response or a message response, determine which response that this should be.""" 
 
         prompt += "\n\nThe following messages were received:"
@@ -188,7 +347,10 @@ class Dictator:
         for employee in employees_list:
             prompt += f"\n- ID: {employee.id}"
         
-        prompt += f"\n\Regarding this event {self.events[self.current_event_index]}, give a specific topic that was not used before for continuation of the conversation to discuss and store it in \"value\". Give a \"progress\" of 1 to end the conversation. Otherwise, give a 0 to continue this conversation."
+        # Events run concurrently now, so the discussion passes its own event instead of relying on an index
+        if event is None:
+            event = self.events[self.current_event_index]
+        prompt += f"\n\Regarding this event {event}, give a specific topic that was not used before for continuation of the conversation to discuss and store it in \"value\". Give a \"progress\" of 1 to end the conversation. Otherwise, give a 0 to continue this conversation."
         return prompt
 
     def get_employee_name(self, employee_id):
@@ -0,0 +1,117 @@
+SEARCH_MARKER = "<<<<<<< SEARCH"
+DIVIDER = "======="
+REPLACE_MARKER = ">>>>>>> REPLACE"
+
+
+def parse_edit_blocks(text):
+    """Parses SEARCH/REPLACE blocks into {path: {"hunks": [{"search", "replace"}, ...]}}.
+
+    Each block is preceded by the file path on its own line. A block cut off before its
+    REPLACE marker is dropped on its own, so the blocks before it still apply.
+    """
+    changes = {}
+    lines = text.splitlines()
+    path = None
+    i = 0
+    while i < len(lines):
+        stripped = lines[i].strip()
+        if stripped.startswith(SEARCH_MARKER):
+            search, i = _collect(lines, i + 1, DIVIDER)
+            replace, i = _collect(lines, i + 1, REPLACE_MARKER)
+            if path is not None and search is not None and replace is not None:
+                changes.setdefault(path, {"hunks": []})["hunks"].append({"search": search, "replace": replace})
+        elif stripped and not stripped.startswith("```"):
+            path = stripped.strip("`*").strip()
+        i += 1
+    return changes
+
+
+def _collect(lines, start, terminator):
+    """Returns (text up to the terminator line, index of that line), or (None, end) when it never comes."""
+    for i in range(start, len(lines)):
+        if lines[i].strip() == terminator:
+            return "\n".join(lines[start:i]), i
+    return None, len(lines)
+
+
+def apply_hunks(source, hunks):
+    """Applies each hunk independently and returns (new source, applied count, rejected hunks)."""
+    applied = 0
+    rejected = []
+    for hunk in hunks:
+        result = apply_hunk(source, hunk["search"], hunk["replace"])
+        if result is None:
+            rejected.append(hunk)
+        else:
+            source = result
+            applied += 1
+    return source, applied, rejected
+
+
+def apply_hunk(source, search, replace):
+    """Replaces the first match of search, tolerating trailing whitespace and indentation drift."""
+    if not search.strip():
+        # An empty search only creates a file; on one with content it's usually a full rewrite that would duplicate it
+        if not source.strip():
+            return replace
+        return None
+
+    if search in source:
+        return source.replace(search, replace, 1)
+
+    source_lines = source.split("\n")
+    search_lines = _trim_blank_edges(search.split("\n"))
+    replace_lines = replace.split("\n")
+
+    match = _find_lines(source_lines, search_lines, lambda line: line.rstrip())
+    if match is not None:
+        return "\n".join(source_lines[:match] + replace_lines + source_lines[match + len(search_lines):])
+
+    match = _find_lines(source_lines, search_lines, lambda line: line.strip())
+    if match is not None:
+        replace_lines = _reindent(replace_lines, _indent(search_lines), _indent(source_lines[match:match + len(search_lines)]))
+        return "\n".join(source_lines[:match] + replace_lines + source_lines[match + len(search_lines):])
+
+    return None
+
+
+def _find_lines(source_lines, search_lines, normalize):
+    target = [normalize(line) for line in search_lines]
+    normalized = [normalize(line) for line in source_lines]
+    for start in range(len(normalized) - len(target) + 1):
+        if normalized[start:start + len(target)] == target:
+            return start
+    return None
+
+
+def _trim_blank_edges(lines):
+    while lines and not lines[0].strip():
+        lines = lines[1:]
+    while lines and not lines[-1].strip():
+        lines = lines[:-1]
+    return lines
+
+
+def _indent(lines):
+    for line in lines:
+        if line.strip():
+            return line[:len(line) - len(line.lstrip())]
+    return ""
+
+
+def _reindent(lines, old_indent, new_indent):
+    """Shifts replacement lines from the model's indentation to the file's."""
+    if old_indent == new_indent:
+        return lines
+    shifted = []
+    for line in lines:
+        if line.startswith(old_indent):
+            shifted.append(new_indent + line[len(old_indent):])
+        else:
+            shifted.append(line)
+    return shifted
+
+
+def format_hunks(hunks):
+    """Renders hunks back into SEARCH/REPLACE text for logging."""
+    return "\n".join(f"{SEARCH_MARKER}\n{h['search']}\n{DIVIDER}\n{h['replace']}\n{REPLACE_MARKER}" for h in hunks)
@@ -0,0 +1,260 @@
+import os
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+from slack_sdk.errors import SlackApiError
+
+
+def default_reply(prompt):
+    return f"Thinking about it: {prompt[:80].strip()} ... here is what I would do next."
+
+
+class FakeLatency:
+    """Simulated network behaviour for a fake provider: a base delay, uniform jitter and a random error rate."""
+
+    def __init__(self, delay=0.0, jitter=0.0, error_rate=0.0, seed=None):
+        self.delay = delay
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            delay = self.delay + self._random.uniform(-self.jitter, self.jitter)
+        time.sleep(max(0.0, delay))
+
+    def fails(self):
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+
+class FakeCallLog:
+    """Records every call a fake answers and how long it took."""
+
+    def __init__(self):
+        self.calls = []
+        self.latencies = []  # (method, seconds)
+        self._lock = threading.Lock()
+
+    def log(self, *call):
+        with self._lock:
+            self.calls.append(call)
+
+    def timed(self, method, started):
+        with self._lock:
+            self.latencies.append((method, time.perf_counter() - started))
+
+
+def billed_meta(prompt, text):
+    # Cohere reports usage as meta.billed_units; words stand in for tokens
+    return SimpleNamespace(billed_units=SimpleNamespace(input_tokens=len(prompt.split()), output_tokens=len(text.split())))
+
+
+class FakeCohereClient(FakeCallLog):
+    """Answers generate/generate_stream/chat locally, streaming the reply a word at a time."""
+
+    def __init__(self, responder=default_reply, token_delay=0.0, first_token_delay=0.0, latency=None):
+        super().__init__()
+        self.responder = responder  # prompt -> completion text
+        self.token_delay = token_delay
+        self.first_token_delay = first_token_delay
+        self.latency = latency or FakeLatency()
+
+    def _start(self, method, model, prompt):
+        self.log(method, model, prompt)
+        self.latency.wait()
+        if self.latency.fails():
+            raise RuntimeError(f"Fake Cohere {method} failed")
+
+    def generate(self, prompt, model=None, **params):
+        started = time.perf_counter()
+        self._start("generate", model, prompt)
+        text = self.responder(prompt)
+        time.sleep(self.first_token_delay + self.token_delay * len(text.split()))
+        self.timed("generate", started)
+        return SimpleNamespace(generations=[SimpleNamespace(text=text)], meta=billed_meta(prompt, text))
+
+    def generate_stream(self, prompt, model=None, **params):
+        started = time.perf_counter()
+        self._start("generate_stream", model, prompt)
+        text = self.responder(prompt)
+        time.sleep(self.first_token_delay)
+        for i, word in enumerate(text.split(" ")):
+            time.sleep(self.token_delay)
+            yield SimpleNamespace(event_type="text-generation", text=word if i == 0 else f" {word}")
+        self.timed("generate_stream", started)
+        yield SimpleNamespace(event_type="stream-end", is_finished=True, response=SimpleNamespace(meta=billed_meta(prompt, text)))
+
+    def chat(self, message, **params):
+        started = time.perf_counter()
+        self._start("chat", params.get("model"), message)
+        text = self.responder(message)
+        time.sleep(self.first_token_delay + self.token_delay * len(text.split()))
+        self.timed("chat", started)
+        return SimpleNamespace(text=text, meta=billed_meta(message, text))
+
+
+class FakeGroqClient(FakeCallLog):
+    """Answers groq.chat.completions.create locally, with usage counted in whitespace-separated tokens."""
+
+    def __init__(self, responder=default_reply, token_delay=0.0, latency=None):
+        super().__init__()
+        self.responder = responder  # prompt (last message content) -> completion text
+        self.token_delay = token_delay
+        self.latency = latency or FakeLatency()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, messages, model=None, stream=False, max_tokens=None, **params):
+        started = time.perf_counter()
+        prompt = messages[-1]["content"]
+        self.log("chat.completions.create", model, prompt)
+        self.latency.wait()
+        if self.latency.fails():
+            raise RuntimeError("Fake Groq completion failed")
+
+        # Whitespace-separated words stand in for tokens, so max_tokens cuts the reply off like the real API
+        words = re.findall(r"\S+\s*", self.responder(prompt))
+        finish_reason = "stop"
+        if max_tokens is not None and len(words) > max_tokens:
+            words, finish_reason = words[:max_tokens], "length"
+        usage = SimpleNamespace(prompt_tokens=len(prompt.split()), completion_tokens=len(words))
+        if stream:
+            return self._stream(words, finish_reason, usage, started)
+
+        time.sleep(self.token_delay * len(words))
+        self.timed("chat.completions.create", started)
+        message = SimpleNamespace(role="assistant", content="".join(words))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason=finish_reason)], usage=usage)
+
+    def _stream(self, words, finish_reason, usage, started):
+        for word in words:
+            time.sleep(self.token_delay)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word), finish_reason=None)], x_groq=None)
+        self.timed("chat.completions.create", started)
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=None), finish_reason=finish_reason)],
+                              x_groq=SimpleNamespace(usage=usage))
+
+
+class FakeFileOutput:
+    """Like replicate's FileOutput: a delivery URL whose bytes can be read without going to the network."""
+
+    def __init__(self, url, data):
+        self.url = url
+        self._data = data
+
+    def read(self):
+        return self._data
+
+    def __str__(self):
+        return self.url
+
+
+class FakeReplicateClient(FakeCallLog):
+    """Answers replicate.run with placeholder images; the same prompt and seed always give the same bytes."""
+
+    def __init__(self, latency=None):
+        super().__init__()
+        self.latency = latency or FakeLatency()
+        self._count = 0
+
+    def run(self, model, input=None, **params):
+        started = time.perf_counter()
+        input = input or {}
+        self.log("run", model, input.get("prompt"))
+        self.latency.wait()
+        if self.latency.fails():
+            raise RuntimeError("Fake Replicate prediction failed")
+        with self._lock:
+            self._count += 1
+            count = self._count
+        self.timed("run", started)
+        data = f"fake image: {model} {input.get('prompt')} {input.get('seed')}".encode("utf-8")
+        return [FakeFileOutput(f"https://replicate.delivery/fake/{count}.png", data)]
+
+
+class FakeSlackResponse(dict):
+    """Just enough of SlackResponse for the error paths: dict access, status_code and headers."""
+
+    def __init__(self, data, status_code=200, headers=None):
+        super().__init__(data)
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeSlackWorkspace:
+    """Channel history shared by every FakeSlackClient in a run, like the bots of one workspace."""
+
+    def __init__(self):
+        self.history = {}  # {channel_id: [message, ...]} oldest first
+        self.lock = threading.Lock()
+        self.clock = time.time()
+
+    def next_ts(self):
+        # Strictly increasing, like Slack's own message timestamps
+        self.clock = max(self.clock + 0.000001, time.time())
+        return f"{self.clock:.6f}"
+
+
+class FakeSlackClient(FakeCallLog):
+    """Keeps channel history in memory and answers the WebClient calls the agents make.
+
+    Posts and edits fail with a 429 at the latency's error rate, so rate-limit handling gets exercised;
+    history reads never fail.
+    """
+
+    def __init__(self, user="UFAKE", workspace=None, latency=None):
+        super().__init__()
+        self.user = user
+        self.workspace = workspace or FakeSlackWorkspace()
+        self.history = self.workspace.history
+        self.latency = latency or FakeLatency()
+
+    def _write(self, method, channel):
+        self.log(method, channel)
+        self.latency.wait()
+        if self.latency.fails():
+            response = FakeSlackResponse({"ok": False, "error": "ratelimited"}, status_code=429, headers={"Retry-After": "0"})
+            raise SlackApiError("ratelimited", response)
+
+    def chat_postMessage(self, channel, text, **kwargs):
+        started = time.perf_counter()
+        self._write("chat_postMessage", channel)
+        with self.workspace.lock:
+            message = {"type": "message", "channel": channel, "user": self.user, "text": text, "ts": self.workspace.next_ts()}
+            self.history.setdefault(channel, []).append(message)
+        self.timed("chat_postMessage", started)
+        return FakeSlackResponse({"ok": True, "channel": channel, "ts": message["ts"], "message": message})
+
+    def chat_update(self, channel, ts, text, **kwargs):
+        started = time.perf_counter()
+        self._write("chat_update", channel)
+        with self.workspace.lock:
+            for message in self.history.get(channel, []):
+                if message["ts"] == ts:
+                    message["text"] = text
+        self.timed("chat_update", started)
+        return FakeSlackResponse({"ok": True, "channel": channel, "ts": ts, "text": text})
+
+    def files_upload_v2(self, channel, initial_comment=None, file_uploads=(), **kwargs):
+        started = time.perf_counter()
+        self._write("files_upload_v2", channel)
+        files = [{"name": upload["filename"], "size": os.path.getsize(upload["file"])} for upload in file_uploads]
+        with self.workspace.lock:
+            message = {"type": "message", "channel": channel, "user": self.user, "text": initial_comment or "",
+                       "files": files, "ts": self.workspace.next_ts()}
+            self.history.setdefault(channel, []).append(message)
+        self.timed("files_upload_v2", started)
+        return FakeSlackResponse({"ok": True, "files": files})
+
+    def conversations_history(self, channel, limit=100, oldest=None, **kwargs):
+        started = time.perf_counter()
+        self.log("conversations_history", channel)
+        self.latency.wait()
+        with self.workspace.lock:
+            messages = [m for m in self.history.get(channel, []) if oldest is None or float(m["ts"]) > float(oldest)]
+        self.timed("conversations_history", started)
+        return FakeSlackResponse({"ok": True, "messages": messages[::-1][:limit], "has_more": len(messages) > limit})
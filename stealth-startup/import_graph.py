@@ -0,0 +1,71 @@
+import posixpath
+import re
+
+# import x from '...', import '...', export { x } from '...', require('...'), import('...')
+IMPORT_PATTERN = re.compile(
+    r"""(?:\bimport\s+(?:[^'"]*?\s+from\s+)?|\bexport\s+[^'"]*?\s+from\s+|\brequire\(\s*|\bimport\(\s*)['"]([^'"]+)['"]"""
+)
+RESOLVE_EXTENSIONS = (".tsx", ".ts", ".jsx", ".js", ".mjs", ".css")
+
+
+def parse_imports(source):
+    return IMPORT_PATTERN.findall(source)
+
+
+def resolve_import(spec, importer, paths):
+    """Maps an import specifier to a project-relative path, or None for packages and unknown files."""
+    if spec.startswith("@/"):
+        base = spec[2:]  # tsconfig maps @/* to the project root
+    elif spec.startswith("."):
+        base = posixpath.normpath(posixpath.join(posixpath.dirname(importer), spec))
+    else:
+        return None
+
+    candidates = [base]
+    candidates += [base + extension for extension in RESOLVE_EXTENSIONS]
+    candidates += [f"{base}/index{extension}" for extension in RESOLVE_EXTENSIONS]
+    for candidate in candidates:
+        if candidate in paths:
+            return candidate
+    return None
+
+
+class ImportGraph:
+    """Which project files import which, built from the sources the project index already holds."""
+
+    def __init__(self, files):
+        paths = set(files)
+        self.imports = {path: set() for path in paths}
+        self.importers = {path: set() for path in paths}
+        self.unresolved = {}  # {path: [specifiers]} local imports we couldn't map to a file
+
+        for path, source in files.items():
+            for spec in parse_imports(source):
+                target = resolve_import(spec, path, paths)
+                if target is not None:
+                    self.imports[path].add(target)
+                    self.importers[target].add(path)
+                elif spec.startswith((".", "@/")):
+                    self.unresolved.setdefault(path, []).append(spec)
+
+    def neighbours(self, path):
+        return self.imports.get(path, set()) | self.importers.get(path, set())
+
+    def dependents(self, paths):
+        """Every file that transitively imports any of the given paths, including the paths themselves."""
+        return self._closure(paths, self.importers)
+
+    def dependencies(self, paths):
+        """Every file the given paths transitively import, including the paths themselves."""
+        return self._closure(paths, self.imports)
+
+    def _closure(self, paths, edges):
+        seen = set()
+        stack = list(paths)
+        while stack:
+            path = stack.pop()
+            if path in seen:
+                continue
+            seen.add(path)
+            stack.extend(edges.get(path, ()))
+        return seen
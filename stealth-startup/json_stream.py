@@ -0,0 +1,109 @@
+import json
+import re
+
+KEY_PATTERN = re.compile(r'\s*,?\s*"((?:[^"\\]|\\.)*)"')
+
+
+def validate_entry(entry):
+    """Why a {"original", "updated"} file entry can't be applied, or None if it can."""
+    if not isinstance(entry, dict):
+        return "entry is not an object"
+    if not isinstance(entry.get("updated"), str):
+        return 'entry has no "updated" text'
+    if not isinstance(entry.get("original", ""), str):
+        return '"original" is not text'
+    return None
+
+
+class FileEntryParser:
+    """Incremental parser for the {"path": {"original": ..., "updated": ...}, ...} change sets SWEAgent asks for.
+
+    feed() takes the completion as it streams and returns each file entry as soon as its object closes, so it can
+    be applied while the rest is still being generated. Text before the opening brace (a code fence, a sentence) is
+    skipped, and if the output is cut off, every entry that closed before the cut is kept.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.finished = False  # The top-level object closed
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.member = []  # Characters of the member being read: "path": {...}
+        self.entries = {}
+        self.rejected = {}  # {path: reason}
+
+    def feed(self, text):
+        """Consumes more of the completion; returns [(path, entry)] for the entries that closed in it."""
+        completed = []
+        for char in text:
+            if self.finished:
+                break
+            if not self.started:
+                if char == "{":
+                    self.started = True
+                    self.depth = 1
+                continue
+
+            if self.in_string:
+                self.member.append(char)
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                continue
+
+            if char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.finished = True
+                    # A member whose value isn't an object ends at the closing brace
+                    self._close_member(completed)
+                    break
+            elif char == "," and self.depth == 1:
+                self._close_member(completed)
+                continue
+
+            self.member.append(char)
+            if self.depth == 1 and char == "}":
+                self._close_member(completed)
+        return completed
+
+    def _close_member(self, completed):
+        text = "".join(self.member).strip().lstrip(",")
+        self.member = []
+        if not text:
+            return
+        try:
+            ((path, entry),) = json.loads("{" + text + "}").items()
+        except (ValueError, TypeError):
+            match = KEY_PATTERN.match(text)
+            self.rejected[match.group(1) if match else text[:60]] = "entry is not valid JSON"
+            return
+
+        reason = validate_entry(entry)
+        if reason is not None:
+            self.rejected[path] = reason
+            return
+        self.entries[path] = entry
+        completed.append((path, entry))
+
+    def truncated_path(self):
+        """Path of the entry that was still open when the output ended, if its key made it out."""
+        if self.finished:
+            return None
+        match = KEY_PATTERN.match("".join(self.member))
+        return match.group(1) if match else None
+
+
+def parse_file_entries(text):
+    """Every complete, valid entry in a full (possibly truncated) completion, plus the parser for its diagnostics."""
+    parser = FileEntryParser()
+    parser.feed(text)
+    return parser.entries, parser
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "llm_cache.sqlite3")
+
+
+class LLMCache:
+    """Content-addressed, on-disk cache of LLM completions shared by every agent and process that opens it."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=5000, max_bytes=50 * 1024 * 1024,
+                 ttl=7 * 24 * 3600, bypass_sampled=True):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl  # Seconds an entry stays valid; None keeps entries until they are evicted
+        self.bypass_sampled = bypass_sampled  # Skip the cache when temperature > 0, since those calls are meant to vary
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self._local = threading.local()  # sqlite connections can't be shared between threads
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as db:
+            db.execute("""CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )""")
+            db.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+            db.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    def _connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")  # Readers in other processes don't block on writers
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    @staticmethod
+    def make_key(kind, model, prompt, params):
+        payload = json.dumps({"kind": kind, "model": model, "prompt": prompt, "params": params}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        db = self._connection()
+        row = db.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is None:
+            return None
+        value, created_at = row
+        with db:
+            if self.ttl is not None and now - created_at > self.ttl:
+                db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        return value
+
+    def set(self, key, value):
+        db = self._connection()
+        now = time.time()
+        with db:
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), now, now),
+            )
+            self._evict(db, now)
+
+    def _evict(self, db, now):
+        """Drops expired entries, then least recently used ones until both size limits hold."""
+        if self.ttl is not None:
+            db.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+
+        count, total = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        rows = db.execute("SELECT key, size FROM responses ORDER BY last_access ASC").fetchall()
+        stale = []
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            stale.append((key,))
+            count -= 1
+            total -= size
+        db.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def _count(self, name):
+        db = self._connection()
+        with db:
+            db.execute(
+                "INSERT INTO counters (name, value) VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET value = value + 1",
+                (name,),
+            )
+
+    def get_or_compute(self, kind, model, prompt, params, compute):
+        """Returns the cached completion for this exact request, calling compute() and storing the result on a miss."""
+        temperature = params.get("temperature")
+        if self.bypass_sampled and temperature is not None and temperature > 0:
+            self.bypasses += 1
+            self._count("bypasses")
+            return compute()
+
+        key = self.make_key(kind, model, prompt, params)
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            self._count("hits")
+            return value
+
+        self.misses += 1
+        self._count("misses")
+        value = compute()
+        if value:
+            self.set(key, value)
+        return value
+
+    def stats(self):
+        """Counters for this instance alongside the totals shared by every process using the cache file."""
+        db = self._connection()
+        shared = dict(db.execute("SELECT name, value FROM counters").fetchall())
+        entries, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "shared": shared,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def clear(self):
+        db = self._connection()
+        with db:
+            db.execute("DELETE FROM responses")
+            db.execute("DELETE FROM counters")
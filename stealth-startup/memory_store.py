@@ -0,0 +1,200 @@
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "memory.sqlite3")
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS memories (
+        id INTEGER PRIMARY KEY,
+        agent TEXT NOT NULL,
+        agent_name TEXT,
+        role TEXT,
+        stage TEXT,
+        kind TEXT NOT NULL,
+        instruction TEXT,
+        content TEXT,
+        metadata TEXT,
+        created_at REAL NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS memories_agent_time ON memories (agent, created_at)",
+    "CREATE INDEX IF NOT EXISTS memories_role_time ON memories (role, created_at)",
+    "CREATE INDEX IF NOT EXISTS memories_stage_time ON memories (stage, created_at)",
+    "CREATE INDEX IF NOT EXISTS memories_kind_time ON memories (kind, created_at)",
+    "CREATE INDEX IF NOT EXISTS memories_time ON memories (created_at)",
+]
+
+# External-content FTS5 index kept in sync by triggers, so keyword search never scans the table
+FTS_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(instruction, content, content='memories', content_rowid='id')",
+    """CREATE TRIGGER IF NOT EXISTS memories_fts_insert AFTER INSERT ON memories BEGIN
+        INSERT INTO memories_fts (rowid, instruction, content) VALUES (new.id, new.instruction, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS memories_fts_delete AFTER DELETE ON memories BEGIN
+        INSERT INTO memories_fts (memories_fts, rowid, instruction, content) VALUES ('delete', old.id, old.instruction, old.content);
+    END""",
+]
+
+# Queued by flush() to make the writer commit its batch without waiting for it to fill
+FLUSH = object()
+
+COLUMNS = ("id", "agent", "agent_name", "role", "stage", "kind", "instruction", "content", "metadata", "created_at")
+
+
+class MemoryStore:
+    """Durable memory shared by every agent and process, in SQLite with WAL so reads never wait on writes.
+
+    Writes are queued and committed in batches by a background thread; call flush() when a read must see
+    everything recorded so far.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH, batch_size=50, flush_interval=0.2):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval  # Longest a write waits for its batch to fill
+        self._local = threading.local()
+        self._pending = queue.Queue()
+        self._closed = False
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = self._connection()
+        with db:
+            for statement in SCHEMA:
+                db.execute(statement)
+            try:
+                for statement in FTS_SCHEMA:
+                    db.execute(statement)
+                self.has_fts = True
+            except sqlite3.OperationalError:
+                # SQLite built without FTS5; keyword queries fall back to LIKE
+                self.has_fts = False
+
+        self._writer = threading.Thread(target=self._write_loop, name="memory-store-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def record(self, agent, kind, instruction=None, content=None, agent_name=None, role=None, stage=None, metadata=None):
+        """Queues a memory for the writer thread and returns immediately."""
+        if self._closed:
+            raise RuntimeError("Memory store is closed.")
+        row = (
+            agent, agent_name, role, stage, kind, instruction,
+            content if isinstance(content, str) or content is None else json.dumps(content),
+            json.dumps(metadata) if metadata is not None else None,
+            time.time(),
+        )
+        self._pending.put(row)
+
+    def _write_loop(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                self._pending.task_done()
+                return
+            if item is FLUSH:
+                self._pending.task_done()
+                continue
+
+            batch = [item]
+            deadline = time.perf_counter() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._pending.get(timeout=max(0.0, deadline - time.perf_counter()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    # Put the stop marker back so it is seen after this batch lands
+                    self._pending.task_done()
+                    self._pending.put(None)
+                    break
+                if item is FLUSH:
+                    self._pending.task_done()
+                    break
+                batch.append(item)
+
+            try:
+                db = self._connection()
+                with db:
+                    db.executemany(
+                        "INSERT INTO memories (agent, agent_name, role, stage, kind, instruction, content, metadata, created_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        batch,
+                    )
+            except sqlite3.Error as e:
+                print(f"Failed to write {len(batch)} memories: {e}")
+            finally:
+                for _ in batch:
+                    self._pending.task_done()
+
+    def flush(self):
+        """Blocks until every recorded memory is committed."""
+        if self._closed:
+            return  # close() already drained the queue, and there's no writer left to answer
+        self._pending.put(FLUSH)
+        self._pending.join()
+
+    def query(self, agent=None, role=None, stage=None, kind=None, since=None, until=None, keyword=None, limit=20):
+        """Newest-first memories matching every given filter, served from the indexes."""
+        conditions = []
+        params = []
+        for column, value in (("agent", agent), ("role", role), ("stage", stage), ("kind", kind)):
+            if value is not None:
+                conditions.append(f"m.{column} = ?")
+                params.append(value)
+        if since is not None:
+            conditions.append("m.created_at >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("m.created_at < ?")
+            params.append(until)
+
+        source = "memories AS m"
+        if keyword:
+            if self.has_fts:
+                source = "memories_fts JOIN memories AS m ON m.id = memories_fts.rowid"
+                conditions.append("memories_fts MATCH ?")
+                # Quote each word so user text can't be read as FTS query syntax
+                params.append(" ".join('"' + word.replace('"', '""') + '"' for word in keyword.split()))
+            else:
+                conditions.append("(m.instruction LIKE ? OR m.content LIKE ?)")
+                params.extend([f"%{keyword}%", f"%{keyword}%"])
+
+        sql = f"SELECT {', '.join('m.' + c for c in COLUMNS)} FROM {source}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY m.created_at DESC LIMIT ?"
+        params.append(limit)
+
+        rows = self._connection().execute(sql, params).fetchall()
+        memories = []
+        for row in rows:
+            memory = dict(zip(COLUMNS, row))
+            if memory["metadata"]:
+                memory["metadata"] = json.loads(memory["metadata"])
+            memories.append(memory)
+        return memories
+
+    def recent(self, agent, limit=10):
+        return self.query(agent=agent, limit=limit)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._pending.put(None)
+        self._writer.join(timeout=30)
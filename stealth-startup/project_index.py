@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+DEFAULT_INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "project_index")
+
+# Files modified this close to when they were read might change again within the same mtime tick
+RACY_WINDOW = 2.0
+
+
+def index_path_for(project_path, index_dir=DEFAULT_INDEX_DIR):
+    """Where the index of a checkout lives; one file per checkout, outside it so it never ends up in a commit."""
+    checkout_id = hashlib.sha1(os.path.abspath(project_path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(index_dir, f"{checkout_id}.json")
+
+
+class ProjectIndex:
+    """Persistent record of the files under a project's mapped directories that only re-reads what changed."""
+
+    def __init__(self, project_path, roots=("app", "components"), index_dir=DEFAULT_INDEX_DIR):
+        self.project_path = project_path
+        self.roots = tuple(roots)
+        self.index_path = index_path_for(project_path, index_dir)
+        self.entries = {}  # {relative path: {mtime_ns, size, hash, scanned_at, content | error, extension}}
+        self.reads = 0  # Files read from disk since the index was created
+        self._map = None
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            if data.get("roots") == list(self.roots):
+                self.entries = data.get("entries", {})
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump({"roots": list(self.roots), "entries": self.entries}, file)
+            os.replace(tmp_path, self.index_path)
+            self._dirty = False
+
+    def refresh(self):
+        """Stats every file and re-reads only those whose mtime or size moved since the last scan."""
+        with self._lock:
+            seen = set()
+            for root in self.roots:
+                self._walk(os.path.join(self.project_path, root), seen)
+
+            for rel_path in list(self.entries):
+                if rel_path not in seen:
+                    del self.entries[rel_path]
+                    self._changed()
+        self.save()
+        return self.project_map()
+
+    def _walk(self, directory, seen):
+        try:
+            items = list(os.scandir(directory))
+        except OSError:
+            return
+        for item in items:
+            if item.is_dir():
+                self._walk(item.path, seen)
+            elif item.is_file():
+                rel_path = os.path.relpath(item.path, self.project_path).replace(os.sep, "/")
+                seen.add(rel_path)
+                self._refresh_entry(rel_path, item.stat())
+
+    def _refresh_entry(self, rel_path, stat):
+        entry = self.entries.get(rel_path)
+        if entry is not None and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            if stat.st_mtime_ns / 1e9 < entry["scanned_at"] - RACY_WINDOW:
+                return
+
+        full_path = os.path.join(self.project_path, rel_path)
+        updated = self._read(full_path, stat)
+        if entry is not None and entry["hash"] == updated["hash"]:
+            # Touched but not edited: keep the entry, just remember the new stat
+            entry.update(mtime_ns=updated["mtime_ns"], size=updated["size"], scanned_at=updated["scanned_at"])
+            self._dirty = True
+            return
+        self.entries[rel_path] = updated
+        self._changed()
+
+    def _read(self, full_path, stat):
+        self.reads += 1
+        entry = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "scanned_at": time.time(),
+            "extension": os.path.splitext(full_path)[1],
+        }
+        try:
+            with open(full_path, "rb") as file:
+                raw = file.read()
+            entry["hash"] = hashlib.sha1(raw).hexdigest()
+            entry["content"] = raw.decode("utf-8")
+        except (OSError, UnicodeDecodeError) as e:
+            entry.setdefault("hash", "")
+            entry["error"] = str(e)
+        return entry
+
+    def update_file(self, rel_path):
+        """Re-indexes a single file after it was written, without walking the tree."""
+        rel_path = rel_path.replace(os.sep, "/")
+        full_path = os.path.join(self.project_path, rel_path)
+        with self._lock:
+            if not os.path.isfile(full_path):
+                if self.entries.pop(rel_path, None) is not None:
+                    self._changed()
+                return
+            # Files outside the mapped roots are written but never shown to the model
+            if rel_path.split("/", 1)[0] in self.roots:
+                self.entries[rel_path] = self._read(full_path, os.stat(full_path))
+                self._changed()
+
+    def _changed(self):
+        self._dirty = True
+        self._map = None
+
+    def project_map(self):
+        """Nested {'app': {...}, 'components': {...}} view with the same leaves map_directory always returned."""
+        with self._lock:
+            if self._map is not None:
+                return self._map
+
+            project_map = {root: {} for root in self.roots}
+            for rel_path in sorted(self.entries):
+                entry = self.entries[rel_path]
+                parts = rel_path.split("/")
+                node = project_map.setdefault(parts[0], {})
+                for part in parts[1:-1]:
+                    node = node.setdefault(part, {})
+                if "error" in entry:
+                    node[parts[-1]] = {"error": entry["error"], "size": 0, "extension": entry["extension"]}
+                else:
+                    node[parts[-1]] = {"content": entry["content"], "size": len(entry["content"]), "extension": entry["extension"]}
+            self._map = project_map
+            return project_map
+
+    def files(self):
+        """{relative path: source} for every readable indexed file."""
+        with self._lock:
+            return {rel_path: entry["content"] for rel_path, entry in self.entries.items() if "content" in entry}
+
+    def file_hash(self, rel_path):
+        entry = self.entries.get(rel_path)
+        return entry["hash"] if entry else None
@@ -0,0 +1,138 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class EventTiming:
+    def __init__(self, name):
+        self.name = name
+        self.start = None  # Seconds since the schedule started
+        self.end = None
+        self.status = "pending"  # pending, done, failed or skipped
+        self.error = None
+
+    @property
+    def duration(self):
+        if self.start is None or self.end is None:
+            return 0.0
+        return self.end - self.start
+
+    def __repr__(self):
+        return f"EventTiming(name={self.name}, status={self.status}, duration={self.duration:.2f}s)"
+
+
+class ScheduleReport:
+    def __init__(self, timings, wall_time, critical_path):
+        self.timings = timings  # {event name: EventTiming}
+        self.wall_time = wall_time
+        self.critical_path = critical_path  # Event names, first to last
+
+    def summary(self):
+        """Human readable breakdown of where the run spent its time."""
+        lines = [f"Schedule finished in {self.wall_time:.2f}s"]
+        for timing in sorted(self.timings.values(), key=lambda t: (t.start is None, t.start or 0)):
+            start = f"{timing.start:7.2f}s" if timing.start is not None else "      -"
+            lines.append(f"  [{timing.status:>7}] {start} +{timing.duration:7.2f}s  {timing.name}")
+        critical_time = sum(self.timings[name].duration for name in self.critical_path)
+        lines.append(f"Critical path ({critical_time:.2f}s): {' -> '.join(self.critical_path)}")
+        return "\n".join(lines)
+
+
+class EventScheduler:
+    """Runs events as a dependency graph, starting each one as soon as everything it depends on has finished."""
+
+    def __init__(self, events, max_workers=4):
+        self.events = list(events)
+        self.max_workers = max_workers
+        self.by_name = {event.name: event for event in self.events}
+        self.dependents = {event.name: [] for event in self.events}
+        self._validate()
+
+    def _validate(self):
+        if len(self.by_name) != len(self.events):
+            raise ValueError("Event names must be unique to be scheduled.")
+
+        for event in self.events:
+            for dependency in event.depends_on:
+                if dependency not in self.by_name:
+                    raise ValueError(f"Event '{event.name}' depends on unknown event '{dependency}'.")
+                self.dependents[dependency].append(event.name)
+
+        # Kahn's algorithm; anything left over sits on a cycle
+        remaining = {event.name: len(event.depends_on) for event in self.events}
+        ready = [name for name, count in remaining.items() if count == 0]
+        visited = 0
+        while ready:
+            name = ready.pop()
+            visited += 1
+            for child in self.dependents[name]:
+                remaining[child] -= 1
+                if remaining[child] == 0:
+                    ready.append(child)
+        if visited != len(self.events):
+            cycle = [name for name, count in remaining.items() if count > 0]
+            raise ValueError(f"Event dependencies contain a cycle: {', '.join(cycle)}")
+
+    def run(self, handler):
+        """Calls handler(event) for every event and returns a ScheduleReport."""
+        timings = {event.name: EventTiming(event.name) for event in self.events}
+        remaining = {event.name: len(event.depends_on) for event in self.events}
+        started_at = time.perf_counter()
+
+        def execute(event):
+            timings[event.name].start = time.perf_counter() - started_at
+            try:
+                handler(event)
+            finally:
+                timings[event.name].end = time.perf_counter() - started_at
+
+        def skip(name):
+            # A failed dependency means none of its descendants can run
+            if timings[name].status != "pending":
+                return
+            timings[name].status = "skipped"
+            for child in self.dependents[name]:
+                skip(child)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = {}
+            for event in self.events:
+                if remaining[event.name] == 0:
+                    pending[pool.submit(execute, event)] = event
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    event = pending.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        print(f"Event '{event.name}' failed: {error}")
+                        timings[event.name].status = "failed"
+                        timings[event.name].error = error
+                        for child in self.dependents[event.name]:
+                            skip(child)
+                        continue
+
+                    timings[event.name].status = "done"
+                    for child in self.dependents[event.name]:
+                        remaining[child] -= 1
+                        if remaining[child] == 0 and timings[child].status == "pending":
+                            pending[pool.submit(execute, self.by_name[child])] = self.by_name[child]
+
+        wall_time = time.perf_counter() - started_at
+        return ScheduleReport(timings, wall_time, self._critical_path(timings))
+
+    def _critical_path(self, timings):
+        """Walks back from the last event to finish through whichever dependency gated each start."""
+        finished = [t for t in timings.values() if t.end is not None]
+        if not finished:
+            return []
+
+        current = max(finished, key=lambda t: t.end).name
+        path = [current]
+        while True:
+            dependencies = [timings[name] for name in self.by_name[current].depends_on if timings[name].end is not None]
+            if not dependencies:
+                break
+            current = max(dependencies, key=lambda t: t.end).name
+            path.append(current)
+        return path[::-1]
@@ -0,0 +1,136 @@
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def embed(text, dim=512, ngram=3):
+    """Hashed bag of words and character n-grams, L2-normalised; needs no model and works offline."""
+    vector = np.zeros(dim, dtype=np.float32)
+    words = WORD_PATTERN.findall(text.lower())
+    features = list(words)
+    for word in words:
+        padded = f" {word} "
+        features.extend(padded[i:i + ngram] for i in range(len(padded) - ngram + 1))
+
+    for feature in features:
+        # crc32 rather than hash() so vectors are identical across processes
+        bucket = zlib.crc32(feature.encode("utf-8"))
+        sign = 1.0 if bucket & 0x80000000 else -1.0
+        vector[bucket % dim] += sign
+
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def summarize_entries(entries, max_chars=160):
+    """Default extractive summary: one clipped line per evicted entry."""
+    lines = []
+    for entry in entries:
+        action = " ".join(str(entry["action"]).split())
+        if len(action) > max_chars:
+            action = action[:max_chars - 3].rstrip() + "..."
+        lines.append(f"{entry['instruction']}: {action}")
+    return "\n".join(lines)
+
+
+class SemanticMemory:
+    """Bounded agent memory with a similarity index, so prompts can pull in only the relevant past decisions.
+
+    Once there are more than `capacity` entries, or entries get older than `max_age` seconds, the oldest are
+    folded into summary entries (at most `max_summaries` of them) instead of being kept verbatim.
+    """
+
+    def __init__(self, capacity=200, max_age=None, max_summaries=20, evict_batch=10, dim=512, summarizer=summarize_entries):
+        self.capacity = capacity
+        self.max_age = max_age
+        self.max_summaries = max_summaries
+        self.evict_batch = evict_batch  # Entries folded into each summary
+        self.dim = dim
+        self.summarizer = summarizer  # list of entries -> summary text
+        self.entries = []  # Oldest first: {"instruction", "action", "created_at", "kind"}
+        self._vectors = []
+        self._matrix = None  # Stacked vectors, rebuilt lazily after changes
+        self._lock = threading.RLock()  # Agents can store from several event threads at once
+
+    def add(self, instruction, action):
+        entry = {"instruction": instruction, "action": action, "created_at": time.time(), "kind": "entry"}
+        vector = embed(f"{instruction} {action}", self.dim)
+        with self._lock:
+            self.entries.append(entry)
+            self._vectors.append(vector)
+            self._matrix = None
+            self._evict()
+        return entry
+
+    def _evict(self):
+        now = time.time()
+        while True:
+            detailed = [i for i, entry in enumerate(self.entries) if entry["kind"] == "entry"]
+            overflow = len(detailed) - self.capacity
+            aged = []
+            if self.max_age is not None:
+                aged = [i for i in detailed if now - self.entries[i]["created_at"] > self.max_age]
+            if overflow <= 0 and not aged:
+                break
+
+            # Fold a whole batch once over capacity so each summary covers several entries
+            batch = set(detailed[:max(overflow, self.evict_batch)]) if overflow > 0 else set()
+            batch.update(aged)
+            self._fold(sorted(batch)[:max(self.evict_batch, overflow)])
+
+        summaries = [i for i, entry in enumerate(self.entries) if entry["kind"] == "summary"]
+        if len(summaries) > self.max_summaries:
+            self._remove(summaries[:len(summaries) - self.max_summaries])
+
+    def _fold(self, indexes):
+        folded = [self.entries[i] for i in indexes]
+        text = self.summarizer(folded)
+        self._remove(indexes)
+
+        summary = {
+            "instruction": "Summary of earlier work",
+            "action": text,
+            "created_at": folded[-1]["created_at"],
+            "kind": "summary",
+        }
+        # Summaries sit ahead of the detailed entries so the list stays oldest first
+        position = sum(1 for entry in self.entries if entry["kind"] == "summary")
+        self.entries.insert(position, summary)
+        self._vectors.insert(position, embed(text, self.dim))
+        self._matrix = None
+
+    def _remove(self, indexes):
+        for i in sorted(indexes, reverse=True):
+            del self.entries[i]
+            del self._vectors[i]
+        self._matrix = None
+
+    def search(self, query, k=3, min_score=0.05):
+        """Top-k entries by cosine similarity to the query, best first."""
+        query_vector = embed(query, self.dim)
+        with self._lock:
+            if self.max_age is not None:
+                self._evict()
+            if not self.entries:
+                return []
+            if self._matrix is None:
+                self._matrix = np.vstack(self._vectors)
+
+            scores = self._matrix @ query_vector
+            best = np.argsort(-scores)[:k]
+            return [self.entries[i] for i in best if scores[i] >= min_score]
+
+    def recall(self):
+        with self._lock:
+            return list(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.recall())
@@ -0,0 +1,113 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+
+# Edits, deletions and joins are not new conversation turns
+IGNORED_SUBTYPES = {"message_changed", "message_deleted", "channel_join", "channel_leave"}
+
+
+class SlackEventSource(ABC):
+    """Pushes new channel messages to subscribers as soon as they arrive."""
+
+    def __init__(self):
+        self._subscribers = {}  # {channel_id: [callback, ...]}
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def start(self):
+        pass
+
+    @abstractmethod
+    def stop(self):
+        pass
+
+    def subscribe(self, channel_id, callback):
+        """Registers callback(message) for a channel and returns a function that removes it again."""
+        with self._lock:
+            self._subscribers.setdefault(channel_id, []).append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                callbacks = self._subscribers.get(channel_id, [])
+                if callback in callbacks:
+                    callbacks.remove(callback)
+
+        return unsubscribe
+
+    def dispatch(self, message):
+        """Delivers a Slack message event to everyone listening on its channel."""
+        if message.get("subtype") in IGNORED_SUBTYPES:
+            return
+        if not message.get("user") or "text" not in message:
+            return
+
+        with self._lock:
+            callbacks = list(self._subscribers.get(message.get("channel"), []))
+        for callback in callbacks:
+            try:
+                callback(message)
+            except Exception as e:
+                print(f"Slack event subscriber failed: {e}")
+
+
+class SocketModeEventSource(SlackEventSource):
+    """Receives message events over Slack Socket Mode (needs an app-level xapp- token)."""
+
+    def __init__(self, app_token, web_client):
+        super().__init__()
+        from slack_sdk.socket_mode import SocketModeClient
+
+        self.client = SocketModeClient(app_token=app_token, web_client=web_client)
+        self.client.socket_mode_request_listeners.append(self._handle_request)
+
+    def start(self):
+        self.client.connect()
+
+    def stop(self):
+        self.client.close()
+
+    def _handle_request(self, client, request):
+        from slack_sdk.socket_mode.response import SocketModeResponse
+
+        if request.type != "events_api":
+            return
+        # Ack first so Slack doesn't redeliver while we're generating a reply
+        client.send_socket_mode_response(SocketModeResponse(envelope_id=request.envelope_id))
+
+        event = request.payload.get("event", {})
+        if event.get("type") == "message":
+            self.dispatch(event)
+
+
+class LocalEventSource(SlackEventSource):
+    """In-process stand-in for Slack events so discussions can run without a workspace."""
+
+    def __init__(self):
+        super().__init__()
+        self.history = {}  # {channel_id: [message, ...]} oldest first
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def post(self, channel_id, user, text):
+        """Records a message the way Slack would and pushes it to subscribers."""
+        message = {
+            "type": "message",
+            "channel": channel_id,
+            "user": user,
+            "text": text,
+            "ts": f"{time.time():.6f}",
+        }
+        with self._lock:
+            self.history.setdefault(channel_id, []).append(message)
+        self.dispatch(message)
+        return message
+
+    def conversations_history(self, channel, limit=100, **kwargs):
+        """Mirrors WebClient.conversations_history (newest first) for code that seeds from history."""
+        with self._lock:
+            messages = list(self.history.get(channel, []))
+        return {"ok": True, "messages": messages[::-1][:limit]}
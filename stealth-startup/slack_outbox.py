@@ -0,0 +1,187 @@
+import atexit
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from urllib.error import URLError
+
+from slack_sdk.errors import SlackApiError
+
+from tracing import tracer
+
+# Slack errors worth another attempt; anything else (bad channel, bad token) fails straight away
+RETRYABLE_ERRORS = {"ratelimited", "service_unavailable", "internal_error", "request_timeout", "fatal_error"}
+
+
+class OutboxItem:
+    def __init__(self, client, channel, text, kwargs):
+        self.client = client
+        self.channel = channel
+        self.text = text
+        self.kwargs = kwargs
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+        self.trace_context = tracer.current_context()  # So the delivery span is attributed to the poster's event
+
+
+class SlackOutbox:
+    """Delivers Slack posts from background workers, one per channel, so agents never wait on Slack.
+
+    Messages keep their order within a channel, each channel is held to min_interval between posts,
+    429s are retried after Slack's Retry-After, and everything queued is flushed at interpreter exit.
+    """
+
+    def __init__(self, min_interval=1.0, max_retries=5, backoff=1.0, batch_window=0.0, max_batch_chars=3000):
+        self.min_interval = min_interval  # Slack allows roughly one message per second per channel
+        self.max_retries = max_retries
+        self.backoff = backoff  # Base delay for retries that don't come with a Retry-After
+        self.batch_window = batch_window  # When > 0, consecutive posts from one client within the window go out as one message
+        self.max_batch_chars = max_batch_chars
+        self._queues = {}  # {channel: deque of OutboxItem}
+        self._workers = {}
+        self._next_post_at = {}  # {channel: perf_counter time the next post may go out}
+        self._in_flight = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self.delivered = 0
+        self.failed = 0
+        self.retries = 0
+        self.latencies = deque(maxlen=1000)  # Seconds from enqueue to delivery
+        atexit.register(self.close)
+
+    def post(self, client, channel, text, **kwargs):
+        """Queues a chat_postMessage and returns a Future for Slack's response."""
+        item = OutboxItem(client, channel, text, kwargs)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Slack outbox is closed.")
+            self._queues.setdefault(channel, deque()).append(item)
+            if channel not in self._workers:
+                worker = threading.Thread(target=self._run, args=(channel,), name=f"slack-outbox-{channel}", daemon=True)
+                self._workers[channel] = worker
+                worker.start()
+            self._cond.notify_all()
+        return item.future
+
+    def _run(self, channel):
+        queue = self._queues[channel]
+        while True:
+            with self._cond:
+                while not queue and not self._closed:
+                    self._cond.wait()
+                if not queue:
+                    return
+                first = queue[0]
+
+            if self.batch_window > 0:
+                time.sleep(max(0.0, first.enqueued_at + self.batch_window - time.perf_counter()))
+
+            with self._cond:
+                batch = [queue.popleft()]
+                size = len(first.text)
+                while self.batch_window > 0 and queue and self._can_join(first, queue[0], size):
+                    size += len(queue[0].text)
+                    batch.append(queue.popleft())
+                self._in_flight += 1
+
+            try:
+                with tracer.context(**first.trace_context), tracer.span("outbox.deliver", "outbox", channel=channel,
+                                                                       messages=len(batch), queued=time.perf_counter() - first.enqueued_at):
+                    self._deliver(channel, batch)
+            except Exception as e:
+                # Anything unexpected (a bad Retry-After, a client bug) fails this batch, not the channel's worker
+                self._fail([item for item in batch if not item.future.done()], e, str(e) or type(e).__name__)
+            finally:
+                with self._cond:
+                    self._in_flight -= 1
+                    self._cond.notify_all()
+
+    def _can_join(self, first, item, size):
+        # Only plain text from the same sender can be merged without changing who said what
+        return item.client is first.client and not item.kwargs and not first.kwargs and size + len(item.text) <= self.max_batch_chars
+
+    def _deliver(self, channel, batch):
+        text = "\n\n".join(item.text for item in batch)
+        attempt = 0
+        while True:
+            time.sleep(max(0.0, self._next_post_at.get(channel, 0.0) - time.perf_counter()))
+            try:
+                response = batch[0].client.chat_postMessage(channel=channel, text=text, **batch[0].kwargs)
+                self._next_post_at[channel] = time.perf_counter() + self.min_interval
+                break
+            except SlackApiError as e:
+                error = e.response.get("error") if hasattr(e.response, "get") else str(e)
+                if getattr(e.response, "status_code", None) == 429 or error == "ratelimited":
+                    delay = float(e.response.headers.get("Retry-After", 1)) if hasattr(e.response, "headers") else 1.0
+                elif error in RETRYABLE_ERRORS or getattr(e.response, "status_code", 0) >= 500:
+                    delay = self.backoff * (2 ** attempt)
+                else:
+                    self._fail(batch, e, error)
+                    return
+            except (URLError, OSError) as e:
+                error = str(e)
+                delay = self.backoff * (2 ** attempt)
+
+            attempt += 1
+            if attempt > self.max_retries:
+                self._fail(batch, None, error)
+                return
+            with self._cond:
+                self.retries += 1
+            self._next_post_at[channel] = time.perf_counter() + delay
+
+        now = time.perf_counter()
+        with self._cond:
+            self.delivered += len(batch)
+            self.latencies.extend(now - item.enqueued_at for item in batch)
+        for item in batch:
+            item.future.set_result(response)
+
+    def _fail(self, batch, exception, error):
+        print(f"Failed to send message to Slack: {error}")
+        with self._cond:
+            self.failed += len(batch)
+        for item in batch:
+            item.future.set_exception(exception or RuntimeError(f"Slack post failed: {error}"))
+
+    def flush(self, timeout=None):
+        """Blocks until every queued message has been delivered or given up on; False on timeout."""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        with self._cond:
+            while self._in_flight or any(self._queues.values()):
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout=30):
+        if self._closed:
+            return
+        flushed = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if not flushed:
+            print("Slack outbox closed with undelivered messages.")
+
+    def metrics(self):
+        with self._cond:
+            depth = {channel: len(queue) for channel, queue in self._queues.items()}
+            latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        return {
+            "queue_depth": depth,
+            "in_flight": self._in_flight,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "retries": self.retries,
+            "latency_p50": percentile(0.5),
+            "latency_p95": percentile(0.95),
+            "latency_max": latencies[-1] if latencies else None,
+        }
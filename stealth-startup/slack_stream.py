@@ -0,0 +1,82 @@
+import time
+
+from slack_sdk.errors import SlackApiError
+
+
+class SlackStreamWriter:
+    """Posts a Slack message as soon as the first tokens arrive and edits it in place as the rest stream in."""
+
+    def __init__(self, slack_client, channel_id, min_interval=1.0):
+        self.slack_client = slack_client
+        self.channel_id = channel_id
+        self.min_interval = min_interval  # chat.update is rate limited, so edits are throttled to one per interval
+        self.text = ""
+        self.ts = None
+        self.failed = False  # The first post failed; retrying it for every chunk would only add to rate limiting
+        self.updates = 0
+        self.started_at = time.perf_counter()
+        self.first_token_at = None
+        self.first_visible_at = None
+        self._last_update = 0.0
+        self._shown = ""
+
+    def write(self, chunk):
+        if not chunk:
+            return
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.text += chunk
+
+        if not self.text.strip() or self.failed:
+            return
+        if self.ts is None:
+            self._post()
+        elif time.perf_counter() - self._last_update >= self.min_interval:
+            self._update(self.text)
+
+    def close(self, transform=None):
+        """Writes the final text (optionally transformed, e.g. formatted) and returns the raw text."""
+        final_text = self.text.strip()
+        shown = transform(final_text) if transform else final_text
+        if self.ts is None:
+            # Also the one retry after a failed first post, with the whole reply
+            if shown:
+                self.text = shown
+                self._post()
+        elif shown != self._shown:
+            self._update(shown)
+        return final_text
+
+    def _post(self):
+        try:
+            response = self.slack_client.chat_postMessage(channel=self.channel_id, text=self.text)
+            self.ts = response["ts"]
+            self.channel_id = response.get("channel", self.channel_id)  # chat.update needs the resolved channel ID
+            self.first_visible_at = time.perf_counter()
+            self._last_update = self.first_visible_at
+            self._shown = self.text
+        except SlackApiError as e:
+            self.failed = True
+            print(f"Failed to send message to Slack: {e.response['error']}")
+
+    def _update(self, text):
+        try:
+            self.slack_client.chat_update(channel=self.channel_id, ts=self.ts, text=text)
+            self.updates += 1
+            self._last_update = time.perf_counter()
+            self._shown = text
+        except SlackApiError as e:
+            self._last_update = time.perf_counter()  # Wait out the interval before trying again
+            print(f"Failed to update Slack message: {e.response['error']}")
+
+    def metrics(self):
+        def since_start(moment):
+            return None if moment is None else moment - self.started_at
+
+        return {
+            "time_to_first_token": since_start(self.first_token_at),
+            "time_to_first_visible": since_start(self.first_visible_at),
+            "total_time": time.perf_counter() - self.started_at,
+            "updates": self.updates,
+            "characters": len(self.text),
+        }
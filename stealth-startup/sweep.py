@@ -0,0 +1,266 @@
+"""Runs many simulations side by side, each in its own process, git worktree and set of Slack channels.
+
+    python sweep.py sweep.json --workers 4
+    python sweep.py sweep.json --offline          # fake providers and a generated repo, to test the machinery
+
+sweep.json holds a list of runs, or {"defaults": {...}, "runs": [...]} where every run is merged over the defaults:
+
+    {
+      "name": "fintech",                       # Used for the worktree, branch and log file names
+      "market": "the small-business lending market",
+      "channels": {"discussion": "C...", "ceo": "C..."},   # Give each run its own channels
+      "event_tasks": {"Make changes to the website": "Add a pricing page"},
+      "ceo_stages": true, "events": true,      # Which parts of the simulation to run
+      "speculative_drafts": 0, "streaming": false, "llm_cache": false, "logo_variants": 1,
+      "logo_seed": null,                       # A fixed seed reuses stored logos across runs
+      "stream_edits": false, "shard_edits": false,   # shard_edits wins when both are set
+      "push": false                            # Push the run's branch with GITHUB_PAT
+    }
+
+Each run's commits land on its own branch (sweep/<sweep id>/<name>) of the dev repo. Worktrees are removed
+afterwards; branches without commits are deleted. Throughput scales with --workers until the providers start
+rate limiting, so keep --workers at or below what the API keys allow.
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from project_index import index_path_for
+from affected_tests import DEFAULT_RESULTS_DIR
+
+DEFAULT_SWEEP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "sweeps")
+
+
+def load_configs(path):
+    with open(path, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    if isinstance(data, list):
+        data = {"runs": data}
+    defaults = data.get("defaults", {})
+
+    configs = []
+    names = set()
+    for i, run in enumerate(data["runs"]):
+        config = {**defaults, **run}
+        slug = re.sub(r"[^A-Za-z0-9._-]+", "-", config.get("name") or f"run-{i + 1}").strip("-") or f"run-{i + 1}"
+        if slug in names:
+            slug = f"{slug}-{i + 1}"
+        names.add(slug)
+        config["name"] = slug
+        configs.append(config)
+    return configs
+
+
+def git(repo, *args):
+    result = subprocess.run(["git", "-C", repo, *args], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)} failed: {(result.stderr or result.stdout).strip()}")
+    return result.stdout.strip()
+
+
+def shared_channels(configs):
+    """Channels used by more than one run; those runs would read each other's discussions."""
+    owners = {}
+    for config in configs:
+        for channel in (config.get("channels") or {"default": None}).values():
+            owners.setdefault(channel, []).append(config["name"])
+    return {channel: names for channel, names in owners.items() if len(names) > 1}
+
+
+def run_simulation(job):
+    """Runs one simulation in a worker process and returns what happened; never raises."""
+    config = job["config"]
+    result = {"name": config["name"], "branch": job["branch"], "status": "done", "errors": [], "phases": {}, "events": {}}
+    started = time.perf_counter()
+
+    with open(job["log_path"], "w", encoding="utf-8") as log, contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            import app
+            from tracing import tracer
+
+            tracer.enable()
+            if job["offline"]:
+                import benchmark
+
+                benchmark.install_fakes(job["fake_config"], job["seed"], job["worktree"])
+                settings = benchmark.offline_settings(job["worktree"], job["memory_store_path"], job["fake_config"])
+            else:
+                settings = app.load_settings()
+                settings["memory_store_path"] = job["memory_store_path"]
+                if not config.get("push"):
+                    settings["github_token"] = None
+                # Socket Mode events are per app, not per run, so sweeps poll their own channels
+                settings["slack_app_token"] = None
+
+            settings["repo_path"] = job["worktree"]
+            if config.get("channels"):
+                settings["channels"] = {**settings["channels"], **config["channels"]}
+            for key in ("market", "speculative_drafts", "streaming", "llm_cache", "logo_variants", "logo_seed", "stream_edits", "shard_edits"):
+                if key in config:
+                    settings[key] = config[key]
+
+            simulation = app.build_simulation(settings)
+            for event in simulation["dictator"].events:
+                if event.name in config.get("event_tasks", {}):
+                    event.metadata["task"] = config["event_tasks"][event.name]
+
+            try:
+                if config.get("ceo_stages", True):
+                    phase_started = time.perf_counter()
+                    simulation["ceo"].take_instruction(settings["market"])
+                    result["phases"]["ceo_stages"] = time.perf_counter() - phase_started
+                if config.get("events", True):
+                    phase_started = time.perf_counter()
+                    report = simulation["dictator"].run_events(simulation["channel_id"])
+                    result["phases"]["events"] = time.perf_counter() - phase_started
+                    for timing in report.timings.values():
+                        result["events"][timing.name] = {"status": timing.status, "duration": timing.duration}
+                        if timing.status != "done":
+                            result["errors"].append(f"{timing.name}: {timing.status} {timing.error or ''}".strip())
+            finally:
+                result["outbox"] = app.shutdown(simulation)
+
+            result["calls"] = {}
+            for span in tracer.finished():
+                if span.category == "event":
+                    continue
+                calls = result["calls"].setdefault(span.category, {"calls": 0, "seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0})
+                calls["calls"] += 1
+                calls["seconds"] += span.duration
+                calls["prompt_tokens"] += span.attrs.get("prompt_tokens") or 0
+                calls["completion_tokens"] += span.attrs.get("completion_tokens") or 0
+            result["commits"] = int(git(job["worktree"], "rev-list", "--count", f"{job['base']}..HEAD"))
+        except Exception as e:
+            result["errors"].append(f"{type(e).__name__}: {e}")
+        if result["errors"]:
+            result["status"] = "failed"
+
+    result["wall_time"] = time.perf_counter() - started
+    return result
+
+
+def run_sweep(configs, repo, workers, sweep_dir, offline=False, fake_config=None, keep_worktrees=False):
+    sweep_id = time.strftime("%Y%m%d-%H%M%S")
+    run_dir = os.path.join(sweep_dir, sweep_id)
+    os.makedirs(run_dir, exist_ok=True)
+    repo = os.path.abspath(repo)
+    base = git(repo, "rev-parse", "HEAD")
+
+    for channel, names in shared_channels(configs).items():
+        if not offline:
+            print(f"Warning: runs {', '.join(names)} share Slack channel {channel} and will see each other's messages.")
+
+    # Worktrees are created up front from this process; concurrent `git worktree add` calls contend on the repo lock
+    jobs = []
+    for i, config in enumerate(configs):
+        worktree = os.path.join(run_dir, "worktrees", config["name"])
+        branch = f"sweep/{sweep_id}/{config['name']}"
+        git(repo, "worktree", "add", "-q", "-b", branch, worktree, base)
+        jobs.append({
+            "config": config,
+            "worktree": worktree,
+            "branch": branch,
+            "base": base,
+            "seed": i + 1,
+            "offline": offline,
+            "fake_config": fake_config,
+            "memory_store_path": os.path.join(run_dir, f"{config['name']}.memory.sqlite3"),
+            "log_path": os.path.join(run_dir, f"{config['name']}.log"),
+        })
+
+    results = []
+    started = time.perf_counter()
+    try:
+        # A fresh spawned interpreter per run: no threads, sockets, clients or spans carried over from another run
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"), max_tasks_per_child=1) as pool:
+            futures = [pool.submit(run_simulation, job) for job in jobs]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                print(f"[{len(results)}/{len(jobs)}] {result['name']}: {result['status']} in {result['wall_time']:.1f}s"
+                      + (f" ({result['errors'][0]})" if result["errors"] else ""))
+    finally:
+        for job in jobs:
+            if keep_worktrees:
+                continue
+            try:
+                git(repo, "worktree", "remove", "--force", job["worktree"])
+                if git(repo, "rev-list", "--count", f"{base}..{job['branch']}") == "0":
+                    git(repo, "branch", "-D", job["branch"])
+            except RuntimeError as e:
+                print(f"Could not clean up {job['worktree']}: {e}")
+            # The worktree's project index and test results are keyed by its path, which won't be used again
+            for stale_path in (index_path_for(job["worktree"]), index_path_for(job["worktree"], DEFAULT_RESULTS_DIR)):
+                if os.path.exists(stale_path):
+                    os.remove(stale_path)
+
+    wall_time = time.perf_counter() - started
+    report = {
+        "sweep_id": sweep_id,
+        "repo": repo,
+        "base": base,
+        "workers": workers,
+        "wall_time": wall_time,
+        "runs_per_hour": len(results) / wall_time * 3600 if wall_time else None,
+        "serial_time": sum(result["wall_time"] for result in results),
+        "runs": sorted(results, key=lambda result: result["name"]),
+    }
+    report_path = os.path.join(run_dir, "report.json")
+    with open(report_path, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2, default=str)
+    report["path"] = report_path
+    return report
+
+
+def format_report(report):
+    lines = [f"Sweep {report['sweep_id']}: {len(report['runs'])} runs on {report['workers']} workers in {report['wall_time']:.1f}s "
+             f"(runs took {report['serial_time']:.1f}s in total, {report['runs_per_hour']:.0f} runs/hour)"]
+    for result in report["runs"]:
+        calls = ", ".join(f"{category} {stats['calls']}" for category, stats in sorted(result.get("calls", {}).items()))
+        lines.append(f"  {result['name']:<24} {result['status']:<7} {result['wall_time']:7.1f}s  "
+                     f"{result.get('commits', 0)} commits on {result['branch']}  [{calls}]")
+    lines.append(f"Report written to {report['path']}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Runs a sweep of simulations in parallel.")
+    parser.add_argument("config", help="JSON file with the runs")
+    parser.add_argument("--repo", default="../stealth-startup-dev", help="Dev repo each run gets a worktree of (same default as app.py)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--sweep-dir", default=DEFAULT_SWEEP_DIR)
+    parser.add_argument("--keep-worktrees", action="store_true")
+    parser.add_argument("--offline", action="store_true", help="Use fake providers and a generated repo")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake provider delay with --offline")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Fake provider jitter with --offline")
+    args = parser.parse_args(argv)
+
+    configs = load_configs(args.config)
+    workers = max(1, min(args.workers, len(configs)))
+    fake_config = None
+    repo = args.repo
+    if args.offline:
+        import benchmark
+
+        fake_config = {"latency": args.latency, "jitter": args.jitter, "error_rate": 0.0, "token_delay": 0.0,
+                       "streaming": False, "speculative_drafts": 0, "slack_min_interval": 0.0, "poll_interval": 0.05}
+        repo = os.path.join(args.sweep_dir, "offline-repo")
+        if not os.path.isdir(os.path.join(repo, ".git")):
+            os.makedirs(repo, exist_ok=True)
+            benchmark.make_project(repo)
+
+    report = run_sweep(configs, repo, workers, args.sweep_dir, offline=args.offline, fake_config=fake_config,
+                       keep_worktrees=args.keep_worktrees)
+    print(format_report(report))
+    return 0 if all(result["status"] == "done" for result in report["runs"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
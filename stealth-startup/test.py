@@ -2,7 +2,7 @@ import os
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
 from dotenv import load_dotenv
-from agent import CEO, CTO
+from agent import CEO, CTOAgent
 from dictator import Dictator
 import time
 
@@ -24,7 +24,7 @@ repo_path = "../stealth-startup-dev"  # Path to the external repo
 
 # Initialize CEO and CTO agents
 ceo_agent = CEO(name="Alice", id=ceo_slack_id, cohere_api_key=cohere_api_key, slack_token=slack_token)
-cto_agent = CTO(name="Bob", id=ceo_slack_id, cohere_api_key=cohere_api_key, slack_token=slack_token, github_repo_path=repo_path, github_token=os.getenv("GITHUB_PAT"))
+cto_agent = CTOAgent(name="Bob", id=ceo_slack_id, cohere_api_key=cohere_api_key, slack_token=slack_token, github_repo_path=repo_path, github_token=os.getenv("GITHUB_PAT"))
 
 # Define the coding task
 task_description = "Fix the formatting and improve the design. Make it more modern."
@@ -1,14 +1,597 @@
+import argparse
+import codecs
+import itertools
+import json
+import math
+import re
+import signal
 import subprocess
 import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from groq import Groq
 
 # Initialize Groq client
 client = Groq(api_key="groq api key")
 
-def execute_command(command):
-    """Execute a shell command and return the output."""
-    result = subprocess.run(command, shell=True, capture_output=True, text=True)
-    return result.stdout, result.stderr
+DEFAULT_TIMEOUT = 300  # Seconds a command may run before it's interrupted
+CONTEXT_TOKEN_BUDGET = 2000  # Most tokens of step history sent with each ai_agent call
+MAX_BATCH_COMMANDS = 6  # Most commands ai_plan may return per round trip in --batch mode
+ERROR_PATTERN = re.compile(r"error|fail|fatal|exception|traceback|cannot|not found|denied|npm ERR!|warn", re.IGNORECASE)
+
+
+class OutputBuffer:
+    """Keeps the first head_lines and the last tail_lines of a command's output; lines in between are only counted."""
+
+    def __init__(self, head_lines=40, tail_lines=120):
+        self.head_lines = head_lines
+        self.head = []
+        self.tail = deque(maxlen=tail_lines)
+        self.lines = 0
+        self.bytes = 0
+        self.omitted = 0
+
+    def append(self, line):
+        self.lines += 1
+        self.bytes += len(line) + 1
+        if len(self.head) < self.head_lines:
+            self.head.append(line)
+            return
+        if len(self.tail) == self.tail.maxlen:
+            self.omitted += 1
+        self.tail.append(line)
+
+    def text(self):
+        lines = list(self.head)
+        if self.omitted:
+            lines.append(f"... [{self.omitted} lines omitted] ...")
+        lines.extend(self.tail)
+        return "\n".join(lines)
+
+
+class CommandResult:
+    def __init__(self, command, output, exit_code, duration, lines=0, omitted=0, timed_out=False, cancelled=False,
+                 shell_exited=False):
+        self.command = command
+        self.output = output  # Head and tail of stdout and stderr, interleaved as they were written
+        self.exit_code = exit_code
+        self.duration = duration
+        self.lines = lines
+        self.omitted = omitted
+        self.timed_out = timed_out
+        self.cancelled = cancelled
+        self.shell_exited = shell_exited  # The command ended the shell (e.g. exit); the next one starts a new shell
+
+    @property
+    def ok(self):
+        return self.exit_code == 0 and not (self.timed_out or self.cancelled or self.shell_exited)
+
+    def status(self):
+        if self.timed_out:
+            state = "timed out and was interrupted"
+        elif self.cancelled:
+            state = "cancelled"
+        elif self.shell_exited:
+            state = f"exited the shell with code {self.exit_code}"
+        else:
+            state = f"exit code {self.exit_code}"
+        omitted = f", {self.omitted} omitted" if self.omitted else ""
+        return f"{state} after {self.duration:.1f}s, {self.lines} lines of output{omitted}"
+
+    def __str__(self):
+        return f"{self.output}\n[{self.status()}]" if self.output else f"[{self.status()}]"
+
+
+class ShellSession:
+    """One long-lived bash per task, so cd, exported variables and activated virtualenvs carry over between commands.
+
+    Output is read as it's produced into an OutputBuffer, so a huge build log costs a bounded amount of memory (and
+    prompt). Commands that run past their timeout, or that cancel() is called for, are interrupted with SIGINT and
+    killed if they don't stop; the shell itself survives.
+    """
+
+    def __init__(self, cwd=None, shell="/bin/bash", timeout=DEFAULT_TIMEOUT, head_lines=40, tail_lines=120,
+                 max_line_length=1000, kill_grace=3.0, on_output=None):
+        self.cwd = os.path.abspath(cwd or os.getcwd())  # Updated after every command, and reused if the shell restarts
+        self.shell = shell
+        self.timeout = timeout
+        self.head_lines = head_lines
+        self.tail_lines = tail_lines
+        self.max_line_length = max_line_length  # Longer lines (minified files, progress bars) are split
+        self.kill_grace = kill_grace  # Seconds between SIGINT and SIGKILL when interrupting
+        self.on_output = on_output  # Called with each output line as it arrives, e.g. print
+        self._token = uuid.uuid4().hex
+        self._ids = itertools.count(1)
+        self._process = None
+        self._current = None
+        self._lock = threading.Lock()  # One command at a time
+
+    def _start(self):
+        self._process = subprocess.Popen(
+            [self.shell, "--noprofile", "--norc"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            cwd=self.cwd, start_new_session=True,
+        )
+        # Job control gives every command its own process group, so it can be interrupted without the shell;
+        # the INT trap stops bash from exiting when a command it's waiting on dies of SIGINT
+        self._write("set -m\ntrap : INT\n")
+        threading.Thread(target=self._read, args=(self._process,), daemon=True).start()
+
+    def _write(self, text):
+        self._process.stdin.write(text.encode("utf-8"))
+        self._process.stdin.flush()
+
+    def _read(self, process):
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        partial = ""
+        while True:
+            chunk = os.read(process.stdout.fileno(), 65536)
+            if not chunk:
+                break
+            partial += decoder.decode(chunk)
+            *lines, partial = partial.split("\n")
+            for line in lines:
+                self._line(line)
+            while len(partial) > self.max_line_length:
+                self._line(partial[:self.max_line_length])
+                partial = partial[self.max_line_length:]
+        if partial:
+            self._line(partial)
+
+        current = self._current
+        if current is not None and not current["done"].is_set():
+            current["exit_code"] = process.wait()
+            current["shell_exited"] = True
+            self._commit(current)
+            current["done"].set()
+
+    def _line(self, line):
+        current = self._current
+        if current is None or current["done"].is_set():
+            return  # Output from a background job between commands
+        if line.startswith(current["marker"]):
+            _, exit_code, cwd = line.split(" ", 2)
+            current["exit_code"] = int(exit_code)
+            self.cwd = cwd
+            # The marker is printed after a newline of its own, so an empty held line is ours, not the command's
+            if current["held"]:
+                self._commit(current)
+            current["done"].set()
+            return
+        self._commit(current)
+        # A carriage return redraws the line (progress bars); only what's left after the last one is kept
+        current["held"] = line.rstrip("\r").rsplit("\r", 1)[-1]
+
+    def _commit(self, current):
+        if current["held"] is None:
+            return
+        current["buffer"].append(current["held"])
+        if self.on_output is not None:
+            self.on_output(current["held"])
+        current["held"] = None
+
+    def _process_groups(self):
+        """Process groups of the shell's children: the running command's pipeline and any background jobs."""
+        pid = self._process.pid
+        try:
+            with open(f"/proc/{pid}/task/{pid}/children", "r") as file:
+                children = file.read().split()
+        except OSError:
+            children = subprocess.run(["ps", "-o", "pid=", "--ppid", str(pid)], capture_output=True, text=True).stdout.split()
+        groups = set()
+        for child in children:
+            try:
+                groups.add(os.getpgid(int(child)))
+            except ProcessLookupError:
+                pass
+        return groups
+
+    def _signal_commands(self, sig):
+        for group in self._process_groups():
+            try:
+                os.killpg(group, sig)
+            except ProcessLookupError:
+                pass
+
+    def cancel(self):
+        """Interrupts the running command, if any; returns once it has stopped. Safe to call from another thread."""
+        current = self._current
+        if current is None or current["done"].is_set():
+            return False
+        current["cancelled"] = True
+        self._signal_commands(signal.SIGINT)
+        if not current["done"].wait(self.kill_grace):
+            self._signal_commands(signal.SIGKILL)
+            if not current["done"].wait(self.kill_grace):
+                # The shell itself is stuck (e.g. reading a heredoc that never ends); replace it on the next command
+                os.killpg(self._process.pid, signal.SIGKILL)
+                current["done"].wait(self.kill_grace)
+        return True
+
+    def run(self, command, timeout=None):
+        """Runs command in the session and returns a CommandResult once it finishes, times out or is cancelled."""
+        timeout = self.timeout if timeout is None else timeout
+        # A syntax error would leave the shell waiting for the rest of the command, so check without running it
+        check = subprocess.run([self.shell, "-n", "-c", command], capture_output=True, text=True)
+        if check.returncode != 0:
+            return CommandResult(command, check.stderr.strip(), check.returncode, 0.0, lines=1)
+
+        with self._lock:
+            if self._process is None or self._process.poll() is not None:
+                self._start()
+            current = {
+                "marker": f"__terminal_{self._token}_{next(self._ids)}__",
+                "buffer": OutputBuffer(self.head_lines, self.tail_lines),
+                "done": threading.Event(),
+                "held": None,
+                "exit_code": None,
+                "cancelled": False,
+                "shell_exited": False,
+            }
+            self._current = current
+            started = time.perf_counter()
+            # stdin comes from /dev/null so a command can't swallow the marker line that follows it; the trap is
+            # re-armed in case an earlier command changed it
+            self._write(f"trap : INT\n{{ {command}\n}} < /dev/null\nprintf '\\n{current['marker']} %s %s\\n' \"$?\" \"$PWD\"\n")
+
+            timed_out = False
+            try:
+                if not current["done"].wait(timeout):
+                    timed_out = True
+                    self.cancel()
+            except KeyboardInterrupt:
+                self.cancel()
+
+            buffer = current["buffer"]
+            return CommandResult(
+                command, buffer.text(), current["exit_code"], time.perf_counter() - started,
+                lines=buffer.lines, omitted=buffer.omitted, timed_out=timed_out,
+                cancelled=current["cancelled"] and not timed_out, shell_exited=current["shell_exited"],
+            )
+
+    def close(self):
+        if self._process is None or self._process.poll() is not None:
+            return
+        self._signal_commands(signal.SIGKILL)
+        self._process.stdin.close()
+        try:
+            self._process.wait(timeout=self.kill_grace)
+        except subprocess.TimeoutExpired:
+            os.killpg(self._process.pid, signal.SIGKILL)
+            self._process.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def estimate_tokens(text):
+    """Rough llama3 token count (about four characters per token), good enough for budgeting."""
+    return math.ceil(len(text) / 4)
+
+
+def reduce_output(text, max_tokens):
+    """Shrinks command output to at most max_tokens: the lines that look like errors, then as much of the tail as fits."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    lines = text.splitlines()
+    budget = max_tokens * 4
+    header = f"[output reduced from {len(lines)} lines]"
+    kept = [header]
+    budget -= len(header) + 1
+
+    errors = []
+    for line in lines:
+        line = line.strip()[:200]
+        if ERROR_PATTERN.search(line) and line not in errors:
+            errors.append(line)
+    # At most half the space goes to error lines, the latest ones first since they're usually the cause
+    error_budget = budget // 2
+    error_lines = []
+    for line in reversed(errors):
+        if len(line) + 1 > error_budget:
+            break
+        error_lines.insert(0, line)
+        error_budget -= len(line) + 1
+    if error_lines:
+        kept += ["Error lines:"] + error_lines + ["Last lines:"]
+        budget -= sum(len(line) + 1 for line in error_lines) + len("Error lines:\nLast lines:\n")
+
+    tail = []
+    for line in reversed(lines):
+        if len(line) + 1 > budget:
+            break
+        tail.insert(0, line)
+        budget -= len(line) + 1
+    return "\n".join(kept + tail)
+
+
+def describe_action(action, limit=120):
+    """One-line form of an action for summaries: edits by filename only, commands by their first line."""
+    if action.startswith("edit:"):
+        filename = action.split(":", 2)[1]
+        return f"edit:{filename} ({len(action)} chars)"
+    first_line = (action.splitlines() or [""])[0]
+    if len(first_line) > limit or "\n" in action.strip():
+        return first_line[:limit] + " ..."
+    return first_line
+
+
+def clip_action(action, max_tokens):
+    """The action as sent to the model, cut to max_tokens; an edit keeps its filename and the start of the content."""
+    if estimate_tokens(action) <= max_tokens:
+        return action
+    return action[:max_tokens * 4] + f" ... [{len(action) - max_tokens * 4} more chars]"
+
+
+class TaskContext:
+    """Step history for the ai_agent prompt, kept within a fixed token budget however long the task runs.
+
+    The last recent_steps steps are shown in full (large outputs reduced to their error lines and tail); older ones
+    are folded into one-line summaries, and the oldest summaries are dropped once even those don't fit.
+    """
+
+    def __init__(self, token_budget=CONTEXT_TOKEN_BUDGET, recent_steps=3):
+        self.token_budget = token_budget
+        self.recent_steps = recent_steps
+        self.steps = []  # [{"full": ..., "summary": ...}], oldest first
+        self.raw_tokens = 0  # What the uncompacted history would have cost
+
+    def add_action(self, action, result):
+        text = str(result)
+        status = result.status() if hasattr(result, "status") else (text.splitlines() or [""])[0][:120]
+        # The summary keeps what the next step most likely needs: the outcome, and the last error if there was one
+        errors = [line.strip()[:160] for line in text.splitlines() if ERROR_PATTERN.search(line)]
+        summary = f"Action: {describe_action(action)} -> {status}" + (f" | {errors[-1]}" if errors else "")
+        step_budget = self.token_budget // (self.recent_steps + 1)
+        # A quarter of the step's share for the action (an edit carries a whole file), the rest for its output
+        action_budget = step_budget // 4
+        action_text = clip_action(action, action_budget)
+        full = f"Action: {action_text}\nResult: {reduce_output(text, step_budget - estimate_tokens(action_text))}"
+        self._add(full, summary, raw=f"Action: {action}\nResult: {text}")
+
+    def add_skipped(self, action):
+        full = f"Action suggested but skipped: {clip_action(action, self.token_budget // (self.recent_steps + 1) // 4)}"
+        self._add(full, f"Action suggested but skipped: {describe_action(action)}", raw=f"Action suggested but skipped: {action}")
+
+    def add_note(self, note):
+        self._add(note, note)
+
+    def _add(self, full, summary, raw=None):
+        self.steps.append({"full": full, "summary": summary})
+        self.raw_tokens += estimate_tokens(raw or full)
+
+    def render(self):
+        """Newest steps first while they fit, then put back in order; a step that doesn't fit is left out, not the rest."""
+        parts = []
+        remaining = self.token_budget - 20  # Room for the "earlier steps omitted" line
+        omitted = 0
+        for age, step in enumerate(reversed(self.steps)):
+            candidates = [step["full"], step["summary"]] if age < self.recent_steps else [step["summary"]]
+            fitting = next((text for text in candidates if estimate_tokens(text) + 1 <= remaining), None)
+            if fitting is None:
+                omitted += 1
+                continue
+            parts.insert(0, fitting)
+            remaining -= estimate_tokens(fitting) + 1
+        if omitted:
+            parts.insert(0, f"[{omitted} earlier steps omitted]")
+
+        return "\n" + "\n".join(parts) if parts else ""
+
+    def report(self):
+        return (f"{len(self.steps)} steps, last prompt context {estimate_tokens(self.render())} tokens "
+                f"(full history would be {self.raw_tokens}); budget {self.token_budget}")
+
+
+def is_skip(result):
+    return isinstance(result, str) and result.startswith("Skipped:")
+
+
+def is_failure(result):
+    return isinstance(result, str) and result.startswith("Failed:")
+
+
+def succeeded(result):
+    """Whether a step's result lets the steps that depend on it run; edits succeed unless they raised."""
+    return result.ok if isinstance(result, CommandResult) else not (is_skip(result) or is_failure(result))
+
+
+class BatchResult:
+    """Combined observation for a batch of commands: each command's output and status, in plan order."""
+
+    def __init__(self, commands, results, wall_time, rounds, output_tokens=400):
+        self.commands = commands
+        self.results = results  # {id: CommandResult, edit message, failure or skip reason}
+        self.wall_time = wall_time
+        self.rounds = rounds  # Groups of commands run one after another
+        self.output_tokens = output_tokens  # Share of the observation each command's output may take
+        self.serial_time = sum(result.duration for result in results.values() if isinstance(result, CommandResult))
+
+    def counts(self):
+        ok = failed = skipped = 0
+        for result in self.results.values():
+            if is_skip(result):
+                skipped += 1
+            elif succeeded(result):
+                ok += 1
+            else:
+                failed += 1
+        return ok, failed, skipped
+
+    def status(self):
+        ok, failed, skipped = self.counts()
+        return (f"{len(self.commands)} commands in {self.rounds} rounds: {ok} succeeded, {failed} failed, {skipped} skipped; "
+                f"{self.wall_time:.1f}s wall vs {self.serial_time:.1f}s one after another")
+
+    def __str__(self):
+        blocks = []
+        for command in self.commands:
+            result = self.results[command["id"]]
+            output = reduce_output(str(result), self.output_tokens)
+            blocks.append(f"[{command['id']}] $ {command['command']}\n{output}")
+        return "\n".join(blocks) + f"\n[{self.status()}]"
+
+
+class PlanningStats:
+    """What --batch mode saved against asking for one command per round trip."""
+
+    def __init__(self):
+        self.round_trips = 0
+        self.completions = 0  # Round trips that only reported the task done, which one-command mode needs too
+        self.llm_time = 0.0
+        self.commands = 0
+        self.serial_time = 0.0  # Commands' own durations, as if run one after another
+        self.wall_time = 0.0
+
+    def planned(self, duration, done=False):
+        self.round_trips += 1
+        self.completions += done
+        self.llm_time += duration
+
+    def ran(self, batch):
+        self.commands += len(batch.commands)
+        self.serial_time += batch.serial_time
+        self.wall_time += batch.wall_time
+
+    def report(self):
+        one_command_trips = self.commands + self.completions
+        trips_saved = one_command_trips - self.round_trips
+        average_llm_time = self.llm_time / self.round_trips if self.round_trips else 0.0
+        time_saved = trips_saved * average_llm_time + self.serial_time - self.wall_time
+        return (f"{self.round_trips} round trips for {self.commands} commands (one-command mode: {one_command_trips}), "
+                f"{trips_saved} round trips and about {time_saved:.1f}s saved")
+
+
+def parse_plan(text, max_commands=MAX_BATCH_COMMANDS):
+    """Commands from a plan reply as [{"id", "command", "depends_on"}], or None when the task is done.
+
+    A reply that isn't the expected JSON is treated as a single command, like in one-command mode. Items without a
+    command, and items reusing an earlier item's id, are dropped.
+    """
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.strip("`").split("\n", 1)[-1]
+    try:
+        plan = json.loads(text[text.index("{"):text.rindex("}") + 1])
+    except ValueError:
+        return None if text == "TASK COMPLETED" else [{"id": "1", "command": text, "depends_on": []}]
+    if not isinstance(plan, dict) or plan.get("done") or not isinstance(plan.get("commands"), list) or not plan["commands"]:
+        return None
+
+    commands = []
+    ids = set()
+    for i, command in enumerate(plan["commands"][:max_commands]):
+        if isinstance(command, str):
+            command = {"command": command}
+        if not isinstance(command, dict) or not str(command.get("command") or "").strip():
+            continue
+        id = str(command.get("id", i + 1))
+        if id in ids:
+            continue  # Results are keyed by id, so a second command with it would hide the first one's result
+        ids.add(id)
+        depends_on = command.get("depends_on") or []
+        commands.append({"id": id, "command": str(command["command"]).strip(),
+                         "depends_on": [str(id) for id in (depends_on if isinstance(depends_on, list) else [depends_on])]})
+    for command in commands:
+        # Dependencies on commands that were cut off or never existed can't be waited for
+        command["depends_on"] = [id for id in command["depends_on"] if id in ids and id != command["id"]]
+    return commands
+
+
+def format_plan(commands):
+    lines = []
+    for command in commands:
+        after = f"  (after {', '.join(command['depends_on'])})" if command["depends_on"] else ""
+        lines.append(f"[{command['id']}] {command['command']}{after}")
+    return "\n".join(lines)
+
+
+def action_result(future):
+    """A command's result, or a failure its dependents can see when the action raised (e.g. an edit to a bad path)."""
+    try:
+        return future.result()
+    except Exception as e:
+        return f"Failed: {type(e).__name__}: {e}"
+
+
+def run_batch(commands, session):
+    """Runs a plan in rounds: each round holds every command whose dependencies are done.
+
+    In each round the command most others depend on runs in the task's session, so a cd or export it makes carries
+    over to them; the rest run side by side, each in a fresh shell in the session's directory. Commands whose
+    dependencies failed are skipped.
+    """
+    results = {}
+    remaining = list(commands)
+    rounds = 0
+    started = time.perf_counter()
+    dependents = {command["id"]: sum(command["id"] in other["depends_on"] for other in commands) for command in commands}
+
+    while remaining:
+        ready = [command for command in remaining if all(id in results for id in command["depends_on"])]
+        if not ready:
+            for command in remaining:
+                results[command["id"]] = "Skipped: its dependencies form a cycle."
+            break
+        remaining = [command for command in remaining if command not in ready]
+
+        runnable = []
+        for command in ready:
+            failed = [id for id in command["depends_on"] if not succeeded(results[id])]
+            if failed:
+                results[command["id"]] = f"Skipped: depends on {', '.join(failed)}, which did not succeed."
+            else:
+                runnable.append(command)
+        if not runnable:
+            continue
+        rounds += 1
+
+        in_session = max(runnable, key=lambda command: dependents[command["id"]])
+        workers = {None: session}
+        for command in runnable:
+            if command is in_session:
+                continue
+            prefix = f"[{command['id']}] "
+            on_output = (lambda line, prefix=prefix: session.on_output(prefix + line)) if session.on_output else None
+            workers[command["id"]] = ShellSession(cwd=session.cwd, shell=session.shell, timeout=session.timeout,
+                                                  head_lines=session.head_lines, tail_lines=session.tail_lines,
+                                                  on_output=on_output)
+
+        pool = ThreadPoolExecutor(max_workers=len(runnable))
+        try:
+            futures = {command["id"]: pool.submit(execute_action, command["command"],
+                                                  workers[None if command is in_session else command["id"]])
+                       for command in runnable}
+            try:
+                for id, future in futures.items():
+                    results[id] = action_result(future)
+            except KeyboardInterrupt:
+                # Ctrl-C lands in this thread, so the running commands are cancelled from here
+                for worker in workers.values():
+                    worker.cancel()
+                for id, future in futures.items():
+                    results[id] = action_result(future)
+        finally:
+            pool.shutdown()
+            for id, worker in workers.items():
+                if id is not None:
+                    worker.close()
+
+    return BatchResult(commands, results, time.perf_counter() - started, rounds)
+
+
+def execute_command(command, session=None, timeout=None):
+    """Execute a shell command in the task's session (or a throwaway one) and return its CommandResult."""
+    if session is None:
+        with ShellSession() as session:
+            return session.run(command, timeout=timeout)
+    return session.run(command, timeout=timeout)
 
 def edit_file(filename, content):
     """Edit a file using direct file writing."""
@@ -37,14 +620,39 @@ Suggested action:"""
     
     return response.choices[0].message.content.strip()
 
-def execute_action(action):
+def ai_plan(task, context="", max_commands=MAX_BATCH_COMMANDS):
+    """Asks for the next few commands at once, with their dependencies, instead of one command per round trip."""
+    prompt = f"""Task: {task}
+Previous Context: {context}
+
+Plan the next steps as a batch of at most {max_commands} shell commands (or "edit:filename:content" actions).
+Commands that don't depend on each other run at the same time. List the ids a command must wait for in
+depends_on; it only runs if they all succeed. A cd or export that later commands need belongs in its own command
+that they depend on; other commands run in a fresh shell in the current directory. Only batch what you can plan
+without seeing earlier output.
+
+Respond with JSON only: {{"commands": [{{"id": "1", "command": "...", "depends_on": []}}]}}
+If the task is complete, respond with {{"done": true}}."""
+
+    response = client.chat.completions.create(
+        messages=[
+            {"role": "system", "content": "You are an AI assistant that plans executable commands to accomplish tasks, running independent steps in parallel. You respond with JSON only."},
+            {"role": "user", "content": prompt}
+        ],
+        model="llama3-70b-8192",
+        max_tokens=600,
+        response_format={"type": "json_object"}
+    )
+
+    return response.choices[0].message.content.strip()
+
+def execute_action(action, session=None):
     """Execute the suggested action and return the result."""
     if action.startswith("edit:"):
         _, filename, content = action.split(":", 2)
         return edit_file(filename, content.strip())
     else:
-        output, error = execute_command(action)
-        return output if output else error
+        return execute_command(action, session=session)
 
 def get_human_approval(action):
     """Ask for human approval before executing an action."""
@@ -60,33 +668,69 @@ def get_human_approval(action):
         else:
             print("Invalid input. Please enter 'y', 'n', or 'm'.")
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Works through a task one approved shell step at a time.")
+    parser.add_argument("--batch", action="store_true", help="Plan several commands per round trip and run independent ones in parallel")
+    args = parser.parse_args(argv)
+
     task = input("Enter a task: ")
-    context = ""
-    
-    while True:
-        action = ai_agent(task, context)
-        
-        if action == "TASK COMPLETED":
-            print("AI suggests the task is completed. Do you agree?")
-            approved, _ = get_human_approval("Mark task as completed")
+    # Recent steps verbatim, older ones summarized, all within CONTEXT_TOKEN_BUDGET
+    context = TaskContext()
+    # One shell for the whole task; output is shown live and only its head and tail are kept
+    session = ShellSession(on_output=lambda line: print(f"  {line}"))
+    stats = PlanningStats()
+
+    try:
+        while True:
+            if args.batch:
+                started = time.perf_counter()
+                commands = parse_plan(ai_plan(task, context.render()))
+                stats.planned(time.perf_counter() - started, done=commands is None)
+                if commands == []:
+                    print("The plan had no usable commands; asking again.")
+                    context.add_note("The last plan had no usable commands. Every command needs an id and a command.")
+                    continue
+                action = "TASK COMPLETED" if commands is None else format_plan(commands)
+            else:
+                action = ai_agent(task, context.render())
+
+            if action == "TASK COMPLETED":
+                print("AI suggests the task is completed. Do you agree?")
+                approved, _ = get_human_approval("Mark task as completed")
+                if approved:
+                    print("Task completed successfully!")
+                    print(f"Context: {context.report()}")
+                    if args.batch:
+                        print(f"Batching: {stats.report()}")
+                    break
+                else:
+                    context.add_note("Human disagreed with task completion.")
+                    continue
+
+            approved, action_to_execute = get_human_approval(action)
+
             if approved:
-                print("Task completed successfully!")
-                break
+                print(f"Executing: {action_to_execute} (Ctrl-C to cancel)")
+                if args.batch:
+                    if action_to_execute != action:
+                        commands = [{"id": "1", "command": action_to_execute, "depends_on": []}]
+                    result = run_batch(commands, session)
+                    stats.ran(result)
+                    action_to_execute = "batch: " + "; ".join(command["command"] for command in commands)
+                else:
+                    result = execute_action(action_to_execute, session)
+                if hasattr(result, "status"):
+                    print(f"Result: {result.status()}")
+                else:
+                    print(f"Result: {result}")
+                if args.batch:
+                    print(f"Batching: {stats.report()}")
+                context.add_action(action_to_execute, result)
             else:
-                context += "\nHuman disagreed with task completion."
-                continue
-        
-        approved, action_to_execute = get_human_approval(action)
-        
-        if approved:
-            print(f"Executing: {action_to_execute}")
-            result = execute_action(action_to_execute)
-            print(f"Result: {result}")
-            context += f"\nAction: {action_to_execute}\nResult: {result}"
-        else:
-            print("Action skipped.")
-            context += f"\nAction suggested but skipped: {action}"
+                print("Action skipped.")
+                context.add_skipped(action)
+    finally:
+        session.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,213 @@
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Span:
+    def __init__(self, span_id, parent_id, name, category, attrs):
+        self.id = span_id
+        self.parent_id = parent_id
+        self.name = name  # e.g. "cohere.generate" or "git commit"
+        self.category = category  # Provider or subsystem: cohere, groq, replicate, slack, git, fs, event
+        self.attrs = attrs  # Tokens, payload sizes, model, event, agent...
+        self.thread = threading.current_thread().name
+        self.thread_id = threading.get_ident()
+        self.start = time.perf_counter()
+        self.end = None
+        self.error = None
+
+    @property
+    def duration(self):
+        return (self.end or time.perf_counter()) - self.start
+
+    def set(self, **attrs):
+        self.attrs.update({key: value for key, value in attrs.items() if value is not None})
+
+    def as_dict(self, origin):
+        return {
+            "id": self.id,
+            "parent": self.parent_id,
+            "name": self.name,
+            "category": self.category,
+            "start": self.start - origin,
+            "duration": self.duration,
+            "thread": self.thread,
+            "error": self.error,
+            **self.attrs,
+        }
+
+
+class NullSpan:
+    """Stands in for a span while tracing is off, so call sites don't need to check."""
+
+    def set(self, **attrs):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+def usage_tokens(response):
+    """(prompt, completion) token counts from a Groq/OpenAI-style usage block or Cohere's billed units."""
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        return getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None)
+    billed = getattr(getattr(response, "meta", None), "billed_units", None)
+    if billed is not None:
+        return getattr(billed, "input_tokens", None), getattr(billed, "output_tokens", None)
+    return None, None
+
+
+class Tracer:
+    """Records timed spans for every external call, tagged with the event and agent they ran for.
+
+    Spans nest per thread. context() tags everything started inside it (e.g. with the event name), and bind()
+    carries those tags onto work handed to a thread pool. Off until enable() is called.
+    """
+
+    def __init__(self, max_spans=100000):
+        self.enabled = False
+        self.max_spans = max_spans  # Oldest spans are dropped past this, so long runs stay bounded
+        self.spans = []
+        self.dropped = 0
+        self.origin = time.perf_counter()
+        self._ids = itertools.count(1)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+        self.origin = time.perf_counter()
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+            self._local.context = {}
+        return self._local.stack
+
+    def current_context(self):
+        self._stack()
+        return dict(self._local.context)
+
+    @contextmanager
+    def context(self, **attrs):
+        """Tags every span started in this thread inside the block with attrs."""
+        self._stack()
+        previous = self._local.context
+        self._local.context = {**previous, **attrs}
+        try:
+            yield
+        finally:
+            self._local.context = previous
+
+    def bind(self, fn):
+        """Wraps fn so it runs with the caller's context when called from another thread."""
+        if not self.enabled:
+            return fn
+        captured = self.current_context()
+
+        def bound(*args, **kwargs):
+            with self.context(**captured):
+                return fn(*args, **kwargs)
+
+        return bound
+
+    @contextmanager
+    def span(self, name, category, **attrs):
+        if not self.enabled:
+            yield NULL_SPAN
+            return
+
+        stack = self._stack()
+        span = Span(next(self._ids), stack[-1].id if stack else None, name, category, {})
+        span.set(**self._local.context)
+        span.set(**attrs)
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end = time.perf_counter()
+            stack.pop()
+            with self._lock:
+                self.spans.append(span)
+                if len(self.spans) > self.max_spans:
+                    del self.spans[0]
+                    self.dropped += 1
+
+    def finished(self):
+        with self._lock:
+            return list(self.spans)
+
+    def export_jsonl(self, path):
+        """One JSON object per span, start times relative to when tracing was enabled."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            for span in self.finished():
+                file.write(json.dumps(span.as_dict(self.origin), default=str) + "\n")
+
+    def export_chrome(self, path):
+        """Chrome trace-viewer / Perfetto JSON (complete "X" events in microseconds)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        spans = self.finished()
+        pid = os.getpid()
+        events = []
+        for thread_id, thread in sorted({(span.thread_id, span.thread) for span in spans}):
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": thread_id, "args": {"name": thread}})
+        for span in spans:
+            args = dict(span.attrs)
+            if span.error:
+                args["error"] = span.error
+            events.append({
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": (span.start - self.origin) * 1e6,
+                "dur": span.duration * 1e6,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": args,
+            })
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file, default=str)
+
+    def summary(self):
+        """Per-phase (event) and per-category time, call counts and tokens, as printable text."""
+        spans = [span for span in self.finished() if span.category != "event"]
+        if not spans:
+            return "No spans recorded."
+
+        def block(title, groups):
+            lines = [title, f"  {'':<56} {'calls':>6} {'total':>9} {'p50':>8} {'p95':>8} {'tokens in/out':>15}"]
+            for key in sorted(groups, key=lambda k: -sum(s.duration for s in groups[k])):
+                group = groups[key]
+                durations = sorted(span.duration for span in group)
+                p50 = durations[len(durations) // 2]
+                p95 = durations[min(len(durations) - 1, int(0.95 * len(durations)))]
+                tokens_in = sum(span.attrs.get("prompt_tokens") or 0 for span in group)
+                tokens_out = sum(span.attrs.get("completion_tokens") or 0 for span in group)
+                lines.append(f"  {str(key)[:56]:<56} {len(group):>6} {sum(durations):>8.2f}s {p50:>7.3f}s {p95:>7.3f}s "
+                             f"{tokens_in:>7}/{tokens_out:<7}")
+            return lines
+
+        by_phase = {}
+        by_category = {}
+        for span in spans:
+            by_phase.setdefault((span.attrs.get("event") or "(no event)", span.category), []).append(span)
+            by_category.setdefault(span.name, []).append(span)
+
+        lines = block("Time by event and provider:", {f"{event} / {category}": group for (event, category), group in by_phase.items()})
+        lines += block("Time by call:", by_category)
+        errors = sum(1 for span in spans if span.error)
+        if errors or self.dropped:
+            lines.append(f"{errors} spans ended in an error, {self.dropped} spans dropped")
+        return "\n".join(lines)
+
+
+# Process-wide tracer used by the agents, Dictator and clients
+tracer = Tracer()